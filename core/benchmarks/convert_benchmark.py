@@ -0,0 +1,40 @@
+import resource
+import shutil
+import time
+
+from core.converters.configuration_data_convertor import HDF5DataConvertorConfig
+from core.converters.hdf5_data_convertor import HDF5DataConvertor
+from core.converters.stage_timer import get_dir_size
+
+
+def get_peak_rss():
+    # ru_maxrss is in KiB on Linux, image writer and read worker processes are counted as children
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own * 1024, children * 1024
+
+
+def run_convert_benchmark(config: HDF5DataConvertorConfig):
+    """
+    Convert `config.root` into a fresh `config.data_root` and measure it end to end.
+    Peak RSS is process wide, so run one benchmark per process to compare configurations.
+    """
+    shutil.rmtree(config.data_root, ignore_errors=True)
+
+    start = time.perf_counter()
+    convertor = HDF5DataConvertor(config)
+    convertor.convert()
+    elapsed = time.perf_counter() - start
+
+    num_frames = convertor.dataset.meta.total_frames
+    peak_rss, peak_rss_children = get_peak_rss()
+    return {
+        'episodes': convertor.dataset.meta.total_episodes,
+        'frames': num_frames,
+        'seconds': elapsed,
+        'frames_per_second': num_frames / elapsed,
+        'peak_rss': peak_rss,
+        'peak_rss_children': peak_rss_children,
+        'input_size': get_dir_size(config.root),
+        'output_size': get_dir_size(config.data_root),
+    }
@@ -0,0 +1,111 @@
+import io
+import json
+import os
+import h5py
+import numpy as np
+from PIL import Image
+
+_DEFAULT_CAMERAS = ('cam_high', 'cam_left_wrist', 'cam_right_wrist')
+
+
+def make_frames(num_frames, height, width, seed=0):
+    """
+    Yield uint8 (H, W, 3) frames of moving gradients plus noise.
+    They compress like camera frames, unlike pure noise or flat images.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = np.stack([xx * 255 // width, yy * 255 // height, (xx + yy) * 127 // (height + width)], axis=-1)
+    for i in range(num_frames):
+        frame = np.roll(base, 2 * i, axis=1) + rng.integers(0, 32, base.shape)
+        yield (frame % 256).astype(np.uint8)
+
+
+def encode_jpeg(frame, quality=90):
+    buffer = io.BytesIO()
+    Image.fromarray(frame).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def make_jpeg_buffers(num_frames, height, width, quality=90, seed=0):
+    return [encode_jpeg(frame, quality) for frame in make_frames(num_frames, height, width, seed)]
+
+
+def make_state(num_frames, state_dim, seed=0):
+    # smooth joint-like trajectories
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, num_frames)[:, None]
+    phase = rng.uniform(0, 2 * np.pi, state_dim)
+    scale = rng.uniform(0.1, 1.0, state_dim)
+    return (scale * np.sin(t + phase)).astype(np.float64)
+
+
+def write_synthetic_episode(
+    path,
+    num_frames=300,
+    cameras=_DEFAULT_CAMERAS,
+    height=480,
+    width=640,
+    state_dim=128,
+    quality=90,
+    chunked=False,
+    compression=None,
+    raw=False,
+    seed=0,
+):
+    """
+    Write an episode in the layout `parse_hdf5` expects: zero padded JPEG records in
+    `observations/images/<cam>`, `observations/qpos` and `action`.
+    With `raw`, the cameras are stored as uint8 (N, H, W, 3) frames instead of JPEG records.
+    With `chunked`, every image record is its own chunk, optionally filtered with `compression`.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    state = make_state(num_frames, state_dim, seed)
+
+    with h5py.File(path, 'w') as f:
+        observations = f.create_group('observations')
+        observations.create_dataset('qpos', data=state)
+        f.create_dataset('action', data=np.roll(state, -1, axis=0))
+
+        images = observations.create_group('images')
+        for i, camera in enumerate(cameras):
+            if raw:
+                frames = np.stack(list(make_frames(num_frames, height, width, seed=seed * len(cameras) + i)))
+                kwargs = dict()
+                if chunked:
+                    kwargs['chunks'] = (1,) + frames.shape[1:]
+                    kwargs['compression'] = compression
+                images.create_dataset(camera, data=frames, **kwargs)
+                continue
+
+            buffers = make_jpeg_buffers(num_frames, height, width, quality, seed=seed * len(cameras) + i)
+            records = np.zeros((num_frames, max(len(buffer) for buffer in buffers)), dtype=np.uint8)
+            for j, buffer in enumerate(buffers):
+                records[j, :len(buffer)] = np.frombuffer(buffer, dtype=np.uint8)
+
+            kwargs = dict()
+            if chunked:
+                kwargs['chunks'] = (1, records.shape[1])
+                kwargs['compression'] = compression
+            images.create_dataset(camera, data=records, **kwargs)
+
+
+def generate_synthetic_dataset(root, num_episodes, task_folder='fold_towel', **kwargs):
+    """
+    Write `num_episodes` synthetic episodes under `root/task_folder`.
+    Existing episodes are reused when they were generated with the same arguments.
+    """
+    spec = {'num_episodes': num_episodes, 'task_folder': task_folder, **kwargs}
+    spec_path = os.path.join(root, 'spec.json')
+    paths = [os.path.join(root, task_folder, f'episode_{i:06d}.hdf5') for i in range(num_episodes)]
+
+    if os.path.exists(spec_path) and all(os.path.exists(path) for path in paths):
+        with open(spec_path, 'r') as f:
+            if json.load(f) == json.loads(json.dumps(spec)):
+                return paths
+
+    for i, path in enumerate(paths):
+        write_synthetic_episode(path, seed=i, **kwargs)
+    with open(spec_path, 'w') as f:
+        json.dump(spec, f, indent=4)
+    return paths
@@ -1,13 +1,47 @@
 import imageio
+import json
 import os
 import numpy as np
 import shutil
+import traceback
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
 
 from lerobot.datasets.lerobot_dataset import LeRobotDataset
+from lerobot.datasets.compute_stats import compute_episode_stats
+from lerobot.datasets.utils import (
+    DEFAULT_FEATURES,
+    EPISODES_PATH,
+    EPISODES_STATS_PATH,
+    append_jsonlines,
+    load_info,
+    load_jsonlines,
+    validate_episode_buffer,
+    validate_feature_dtype_and_shape,
+    validate_features_presence,
+    write_info,
+    write_jsonlines,
+)
 
 from .configuration_data_convertor import DataConvertorConfig
+from .dtype_policy import DtypePolicy
+from .episode_batch import EpisodeBatch
+from .frame_pool import FramePool
+from .memory_budget import MemoryBudget
+from .parquet_writer import supports_direct_parquet, write_episode_parquet
+from .stage_timer import StageTimer, get_dir_size
+from .state_layout import compile_layout
+from .video_encoding import (
+    VIDEO_PROFILES,
+    EpisodeVideoWriter,
+    encode_video_frames,
+    get_video_profile,
+    get_video_profile_info,
+)
 
 
 def load_image(path):
@@ -20,19 +54,57 @@ def get_lerobot_default_root():
     return os.path.expanduser('~/.cache/huggingface/lerobot')
 
 
+def _extend_column(episode_buffer, key, values):
+    # columns start as the empty lists of `create_episode_buffer`, `save_episode` stacks them either way
+    column = episode_buffer[key]
+    if isinstance(column, list) and not column:
+        episode_buffer[key] = values
+    else:
+        episode_buffer[key] = np.concatenate([np.asarray(column), values])
+
+
+# source of every committed episode, appended after each `save_episode`
+SOURCES_PATH = 'meta/sources.jsonl'
+# sources that failed to convert in the last run, with their tracebacks
+QUARANTINE_PATH = 'meta/quarantine.json'
+
+
+@dataclass
+class EncodedImage:
+    """
+    Compressed image that is written to the dataset as-is instead of being decoded and re-encoded.
+    """
+    data: bytes
+    shape: Tuple[int, int, int]
+    suffix: str = '.jpg'
+
+
 class BaseDataConvertor(ABC):
     def __init__(self, config: DataConvertorConfig):
         self.config = config
         self.dataset = None
+        self.completed_sources = set()
+        self.failures = []
+        self.timer = StageTimer(config.profile_stages, config.profile_episodes)
+        self.budget = MemoryBudget(config.memory_budget)
+        self.dtype_policy = DtypePolicy(config.dtypes, config.dtype_tolerance)
+        self.frame_pool = FramePool() if config.frame_pool else None
+        self._queued_image_nbytes = None
+        self._save_executor = None
+        self._pending_saves = deque()
+        self.video_profile = get_video_profile(config.video_profile, config.video_options)
+        self.video_writer = None
 
-        if self.config.overwrite:
+        if self.config.resume:
+            self._resume_dataset()
+        elif self.config.overwrite:
             self._check_overwrite()
         
     @abstractmethod
-    def _yield_episodes(self) -> List[Dict[str, Any]]:
+    def _yield_episodes(self) -> Iterator[EpisodeBatch]:
         """
-        Return a list of frames for the given episode.
-        Each frame is a dictionary with keys corresponding to data fields.
+        Yield episodes as EpisodeBatch, or any object with the same `frame` / `iter_batches` interface.
+        Lists of per-frame dicts are still accepted and converted on the fly.
         """
         pass
 
@@ -55,8 +127,100 @@ class BaseDataConvertor(ABC):
                     return
                 shutil.rmtree(data_root, ignore_errors=True)
 
+    def _get_data_root(self):
+        if self.config.data_root is not None:
+            return self.config.data_root
+        return os.path.join(get_lerobot_default_root(), self.config.repo_id)
+
+    def _resume_dataset(self):
+        """
+        Reopen an existing dataset and collect the sources it already contains, so they are skipped.
+        Files of an episode whose save was interrupted are removed, the episode is converted again, and so are
+        saved episodes whose source was not recorded yet.
+        """
+        data_root = self._get_data_root()
+        info_path = os.path.join(data_root, 'meta', 'info.json')
+        if not os.path.exists(info_path):
+            return
+
+        with open(info_path, 'r') as f:
+            total_episodes = json.load(f)['total_episodes']
+        if total_episodes == 0:
+            # nothing committed yet, start from scratch
+            shutil.rmtree(data_root, ignore_errors=True)
+            return
+
+        sources_path = os.path.join(data_root, SOURCES_PATH)
+        if not os.path.exists(sources_path):
+            raise ValueError(f'Cannot resume {data_root}: it has no {SOURCES_PATH}, the converted sources are unknown.')
+
+        records = load_jsonlines(Path(sources_path))
+        recorded = sorted(record['episode_index'] for record in records)
+        if recorded != list(range(len(recorded))) or len(recorded) > total_episodes:
+            raise ValueError(f'Cannot resume {data_root}: {SOURCES_PATH} records episodes {recorded}, '
+                             f'which do not match the {total_episodes} saved episodes.')
+        if len(recorded) < total_episodes:
+            # killed between saving the episodes and recording their sources, they are converted again
+            print(f'Rolling back episodes {len(recorded)} to {total_episodes - 1} of {data_root}: their sources were not recorded.')
+            total_episodes = self._rollback_episodes(data_root, len(recorded))
+            if total_episodes == 0:
+                shutil.rmtree(data_root, ignore_errors=True)
+                return
+
+        # before loading, the data files are read as one dataset and checked against the episodes
+        for pattern in ('*.parquet', '*.mp4'):
+            for path in Path(data_root).rglob(pattern):
+                if int(path.stem.split('_')[-1]) >= total_episodes:
+                    path.unlink()
+        shutil.rmtree(os.path.join(data_root, 'images'), ignore_errors=True)
+
+        self.dataset = LeRobotDataset(
+            self.config.repo_id,
+            root=data_root,
+            video_backend=self.config.video_backend if self.config.video_backend != 'none' else None,
+        )
+        if self.config.image_writer_processes or self.config.image_writer_threads:
+            self.dataset.start_image_writer(self.config.image_writer_processes, self.config.image_writer_threads)
+        self.dataset.episode_buffer = self.dataset.create_episode_buffer()
+
+        recorded = self.dataset.meta.info.get('video_profile')
+        if self.video_profile is None and recorded is not None:
+            # keep encoding the new episodes like the existing ones
+            self.video_profile = get_video_profile(recorded['name'], {k: v for k, v in recorded.items() if k != 'name'})
+        elif self.video_profile is not None and (
+            recorded is None or recorded != get_video_profile_info(self.config.video_profile, self.video_profile)
+        ):
+            raise ValueError(f'Cannot resume {data_root} with video profile {self.config.video_profile}: '
+                             f'it was encoded with {recorded or "the lerobot defaults"}.')
+        self._setup_video_encoding()
+
+        self.completed_sources = {record['source'] for record in records if record['source'] is not None}
+        print(f'Resuming {data_root}: {total_episodes} episodes from {len(self.completed_sources)} sources already converted.')
+
+    @staticmethod
+    def _rollback_episodes(data_root, num_episodes):
+        """
+        Drop the metadata of the episodes from `num_episodes` on, their files are removed with the other leftovers.
+        """
+        root = Path(data_root)
+        episodes = [episode for episode in load_jsonlines(root / EPISODES_PATH) if episode['episode_index'] < num_episodes]
+        write_jsonlines(episodes, root / EPISODES_PATH)
+        episodes_stats = load_jsonlines(root / EPISODES_STATS_PATH)
+        write_jsonlines([stats for stats in episodes_stats if stats['episode_index'] < num_episodes], root / EPISODES_STATS_PATH)
+
+        info = load_info(root)
+        num_videos = len([key for key, feature in info['features'].items() if feature['dtype'] == 'video'])
+        info['total_episodes'] = num_episodes
+        info['total_frames'] = sum(episode['length'] for episode in episodes)
+        info['total_videos'] = num_episodes * num_videos
+        info['total_chunks'] = -(-num_episodes // info['chunks_size'])
+        info['splits'] = {'train': f'0:{num_episodes}'}
+        write_info(info, root)
+        return num_episodes
+
     def create_dataset(self, example_data: dict[str, np.ndarray]):
         image_dtype = 'video' if self.config.video_backend != 'none' else 'image'
+        layout = compile_layout(self.config.state_layout)
         features = {}
         for key, value in example_data.items():
             if key.startswith(self.config.image_prefix):
@@ -67,10 +231,17 @@ class BaseDataConvertor(ABC):
                 }
             elif key != 'task':
                 features[key] = {
-                    'dtype': str(value.dtype),
+                    'dtype': str(self.dtype_policy.get_dtype(key, value.dtype)),
                     'shape': value.shape,
                     'names': [key],
                 }
+                if layout is not None and key in ('observation.state', 'action'):
+                    features[key]['names'] = layout.names
+
+        low_dim_keys = {key for key, feature in features.items() if feature['dtype'] not in ('image', 'video')}
+        unknown = set(self.dtype_policy.dtypes) - low_dim_keys
+        if unknown:
+            raise ValueError(f'dtypes are set for {sorted(unknown)}, which are not low-dim features of the episodes.')
 
         self.dataset = LeRobotDataset.create(
             repo_id=self.config.repo_id,
@@ -82,22 +253,419 @@ class BaseDataConvertor(ABC):
             image_writer_threads=self.config.image_writer_threads,
             features=features,
         )
+
+        if layout is not None:
+            # lets downstream tools map output dimensions back to the source vectors
+            self.dataset.meta.info['state_layout'] = layout.spec
+        if self.video_profile is not None and self.dataset.meta.video_keys:
+            self.dataset.meta.info['video_profile'] = get_video_profile_info(self.config.video_profile, self.video_profile)
+        write_info(self.dataset.meta.info, self.dataset.root)
+        self._setup_video_encoding()
     
-    def convert(self):
-        for episode in self._yield_episodes():
-            if self.config.check_only:
-                print('Check only mode, skipping data processing.')
+    def _setup_video_encoding(self):
+        if self.config.stream_video and self.dataset.meta.video_keys:
+            # frames go straight to the encoders as they are added, save_episode finds no images to encode
+            self.video_writer = EpisodeVideoWriter(self.video_profile or VIDEO_PROFILES['default'], self.dataset.fps)
+        elif self.video_profile is not None:
+            # save_episode encodes through this method, replacing it covers both the sync and async saves
+            self.dataset.encode_episode_videos = self._encode_episode_videos
+
+    def _encode_episode_videos(self, episode_index: int):
+        """
+        LeRobotDataset.encode_episode_videos with the encoder settings of the video profile.
+        """
+        dataset = self.dataset
+        for key in dataset.meta.video_keys:
+            video_path = dataset.root / dataset.meta.get_video_file_path(episode_index, key)
+            if video_path.is_file():
                 continue
+            img_dir = dataset._get_image_file_path(episode_index=episode_index, image_key=key, frame_index=0).parent
+            encode_video_frames(img_dir, video_path, dataset.fps, self.video_profile)
+            shutil.rmtree(img_dir)
+
+        if len(dataset.meta.video_keys) > 0 and episode_index == 0:
+            dataset.meta.update_video_info()
+            write_info(dataset.meta.info, dataset.root)
+
+    def check(self):
+        """
+        Read every episode without writing anything. Convertors override this with cheaper checks.
+        """
+        num_episodes, num_frames = 0, 0
+        for episode in self._yield_episodes():
+            num_episodes += 1
+            num_frames += len(episode)
+        print(f'Checked {num_episodes} episodes with {num_frames} frames.')
+
+    def convert(self):
+        if self.config.check_only:
+            self.check()
+            return
+
+        initial_size = get_dir_size(self.dataset.root) if self.timer.enabled and self.dataset is not None else 0
+        initial_episodes = self.dataset.meta.total_episodes if self.dataset is not None else 0
+
+        if self.config.async_save:
+            self._save_executor = ThreadPoolExecutor(max_workers=1)
+
+        try:
+            episodes = iter(self._yield_episodes())
+            while True:
+                with self.timer.stage('read'):
+                    episode = next(episodes, None)
+                if episode is None:
+                    break
+
+                if isinstance(episode, list):
+                    episode = EpisodeBatch.from_frames(episode)
+
+                source = getattr(episode, 'source', None)
+                if source is not None and source in self.completed_sources:
+                    continue
+                if len(episode) == 0:
+                    print(f'Skipping {source}: the episode has no frames.')
+                    continue
+
+                # lazy episodes hold no frames yet, their batches are charged as they are read
+                nbytes = getattr(episode, 'nbytes', 0)
+                self.budget.charge(nbytes)
+                self._write_episode(episode, source)
+                self.budget.release(nbytes)
+        finally:
+            try:
+                if self._save_executor is not None:
+                    # episodes handed over before an error are still saved, they are complete
+                    self._save_executor.shutdown()
+                    self._save_executor = None
+                    self._wait_for_saves(0)
+            finally:
+                # a running image writer process keeps the interpreter alive after an error
+                if self.dataset is not None:
+                    self.dataset.stop_image_writer()
+                self._write_quarantine_report()
+
+        if self.timer.enabled and self.dataset is not None:
+            self.timer.count('bytes_written', get_dir_size(self.dataset.root) - initial_size)
+            self.timer.count('bytes_in_flight_peak', self.budget.peak)
+        if self.budget.limit > 0:
+            print(f'Peak decoded frames in flight: {self.budget.peak / 2 ** 20:.1f} MiB '
+                  f'(budget {self.budget.limit / 2 ** 20:.1f} MiB).')
+        self.dtype_policy.report()
+        if self.frame_pool is not None:
+            stats = self.frame_pool.stats
+            for name, value in stats.items():
+                self.timer.count(f'frame_pool_{name}', value)
+            print(f'Frame pool: {stats["allocated"]} arenas allocated ({stats["allocated_bytes"] / 2 ** 20:.1f} MiB), '
+                  f'{stats["reused"]} of {stats["acquired"]} cameras decoded into reused arenas.')
+        self.timer.report(self.config.profile_report_path)
+
+        num_episodes = self.dataset.meta.total_episodes if self.dataset is not None else 0
+        if self.failures and num_episodes == initial_episodes:
+            raise RuntimeError(f'No episode was converted, all {len(self.failures)} sources failed.')
+
+    def _write_episode(self, episode, source=None):
+        self.timer.start_episode(source)
+        if self.timer.enabled:
+            self.timer.count('frames', len(episode))
+            if source is not None and os.path.isfile(source):
+                self.timer.count('bytes_read', os.path.getsize(source))
+
+        if self.dataset is None:
+            try:
+                with self.timer.stage('read'):
+                    example_data = episode.frame(0)
+            except Exception as e:
+                self._fail_episode(source, e)
+                return
+            # outside of the per-source handling, bad settings (dtypes, features, data root) abort the run
+            with self.timer.stage('create_dataset'):
+                self.create_dataset(example_data)
+
+        try:
+            self._add_batches(episode, source)
+            # a failed flush of the encoders quarantines the episode like a failed read
+            video_stats = self._close_videos()
+            if self._save_executor is None:
+                self._save_episode(source, video_stats)
+        except Exception as e:
+            # a bad source (truncated file, corrupt frame, ...) or a failed save, nothing of the episode is kept
+            self._fail_episode(source, e)
+            return
+
+        if self._save_executor is not None:
+            # a failed background save aborts the run, the episodes after it are already numbered
+            self._submit_save(source, video_stats)
+        self.timer.end_episode()
+        self._release_frames()
+
+    def _fail_episode(self, source, error):
+        self.timer.end_episode()
+        self._discard_episode()
+        self._release_frames()
+        self._quarantine(source, error)
+
+    def _release_frames(self):
+        # the image writer is drained by every save and discard, so the frames of the episode are no longer read
+        if self.frame_pool is not None:
+            self.frame_pool.release_all()
+
+    def _add_batches(self, episode, source=None):
+        if self.video_writer is not None:
+            self._open_videos(len(episode))
         
-            if self.dataset is None:
-                self.create_dataset(episode[0])
-            
-            for frame in episode:
-                if 'task' in frame:
-                    task = frame['task']
-                    del frame['task']
-                else:
-                    task = self.config.default_task
+        writer = self.dataset.image_writer
+        # streamed episodes read their frames lazily, time that as reading rather than writing
+        batches = iter(episode.iter_batches())
+        while True:
+            with self.timer.stage('read'):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            streamed = batch is not episode
+            if streamed:
+                self.budget.charge(batch.nbytes)
+            track_writer = writer is not None and (writer.num_processes > 0 or streamed)
+            try:
+                with self.timer.stage('add_episode'):
+                    if track_writer:
+                        # backpressure: wait for the image writer when its queue exceeds the memory budget
+                        self.budget.wait_for(lambda: self._get_writer_backlog(shared=streamed))
+                    tasks = batch.tasks if batch.tasks is not None else [self.config.default_task] * len(batch)
+                    self.add_episode(self.dtype_policy(batch.data, source), tasks)
+            finally:
+                if streamed:
+                    # from here on the frames of the batch only live in the image writer queue
+                    self.budget.release(batch.nbytes)
+
+    def _open_videos(self, num_frames):
+        dataset = self.dataset
+        if dataset.episode_buffer is None:
+            dataset.episode_buffer = dataset.create_episode_buffer()
+        episode_index = dataset.episode_buffer['episode_index']
+        self.video_writer.open({
+            key: dataset.root / dataset.meta.get_video_file_path(episode_index, key) for key in dataset.meta.video_keys
+        }, num_frames)
+
+    def _close_videos(self):
+        if self.video_writer is None:
+            return None
+        with self.timer.stage('encode_video'):
+            return self.video_writer.close()
+
+    def _save_episode(self, source=None, video_stats=None):
+        if self.config.direct_parquet or video_stats is not None:
+            self.dataset._wait_image_writer()
+            episode_buffer = self.dataset.episode_buffer
+            self.dataset.episode_buffer = None
+            self._save_episode_buffer(episode_buffer, source, background=False, video_stats=video_stats)
+            return
+
+        with self.timer.stage('save_episode'):
+            self.dataset.save_episode()
+        self._record_source(self.dataset.meta.total_episodes - 1, source)
+
+    def _discard_episode(self):
+        """
+        Remove what was written of the episode being converted: its images and, after a save that failed
+        half-way, its parquet and video files. Committed episodes and the ones saved in the background are untouched.
+        """
+        dataset = self.dataset
+        if dataset is None:
+            return
+        episode_index = dataset.meta.total_episodes
+        if dataset.episode_buffer is not None:
+            # ahead of total_episodes while earlier episodes are saved in the background
+            episode_index = int(np.ravel(dataset.episode_buffer['episode_index'])[0])
+
+        if self.video_writer is not None:
+            self.video_writer.abort()
+        # queued images would land in the directories removed below
+        dataset._wait_image_writer()
+        for key in dataset.meta.camera_keys:
+            image_dir = dataset._get_image_file_path(episode_index=episode_index, image_key=key, frame_index=0).parent
+            shutil.rmtree(image_dir, ignore_errors=True)
+        paths = [dataset.meta.get_data_file_path(episode_index)]
+        paths += [dataset.meta.get_video_file_path(episode_index, key) for key in dataset.meta.video_keys]
+        for path in paths:
+            (dataset.root / path).unlink(missing_ok=True)
+        dataset.episode_buffer = dataset.create_episode_buffer(episode_index=episode_index)
+
+    def _quarantine(self, source, error):
+        """
+        Record a source that failed to convert, it is skipped. Aborts once more than `max_failures` sources failed.
+        """
+        self.failures.append({
+            'source': source,
+            'error': repr(error),
+            'traceback': ''.join(traceback.format_exception(error)),
+        })
+        if len(self.failures) > self.config.max_failures:
+            raise RuntimeError(f'{len(self.failures)} sources failed to convert, '
+                               f'more than max_failures={self.config.max_failures}.') from error
+        print(f'Skipping {source}: {error!r}')
+
+    def _write_quarantine_report(self):
+        if not self.failures:
+            return
+        report_path = self.config.quarantine_report_path
+        if report_path is None and self.dataset is not None:
+            report_path = self.dataset.root / QUARANTINE_PATH
+        if report_path is not None:
+            with open(report_path, 'w') as f:
+                json.dump({'num_failures': len(self.failures), 'failures': self.failures}, f, indent=4)
+        print(f'{len(self.failures)} sources failed to convert'
+              + (f', see {report_path}.' if report_path is not None else '.'))
+
+    def _record_source(self, episode_index, source):
+        # recorded only once the episode is fully saved, an interrupted episode is converted again on resume.
+        # Episodes without a source are recorded too, resume checks that every saved episode has its record
+        record = {'episode_index': episode_index, 'source': source}
+        append_jsonlines(record, self.dataset.root / SOURCES_PATH)
+
+    def _wait_for_saves(self, max_pending):
+        while len(self._pending_saves) > max_pending:
+            # re-raises the error of a failed save
+            self._pending_saves.popleft().result()
+
+    def _submit_save(self, source, video_stats=None):
+        """
+        Hand the episode buffer over to the save thread and start the next episode in a fresh buffer.
+        """
+        with self.timer.stage('save_wait'):
+            # the image writer queue is shared by all episodes, so this episode's images are flushed here
+            self.dataset._wait_image_writer()
+            self._wait_for_saves(max(1, self.config.max_pending_saves) - 1)
+
+        episode_buffer = self.dataset.episode_buffer
+        self.dataset.episode_buffer = self.dataset.create_episode_buffer(episode_index=episode_buffer['episode_index'] + 1)
+        self._pending_saves.append(self._save_executor.submit(
+            self._save_episode_buffer, episode_buffer, source, video_stats=video_stats
+        ))
+
+    def _save_episode_buffer(self, episode_buffer, source=None, background=True, video_stats=None):
+        """
+        LeRobotDataset.save_episode for a detached buffer whose images are already written.
+        Saves run one at a time in episode order, so the metadata is appended in order. The dataset-wide
+        file count checks of save_episode are skipped, they scan the whole dataset for every episode.
+        With `video_stats` the videos were already encoded by the video writer, which sampled their stats.
+        """
+        dataset = self.dataset
+        meta = dataset.meta
+        with self.timer.stage('save_episode', background=background):
+            validate_episode_buffer(episode_buffer, meta.total_episodes, dataset.features)
+
+            episode_length = episode_buffer.pop('size')
+            tasks = episode_buffer.pop('task')
+            episode_tasks = list(set(tasks))
+            episode_index = episode_buffer['episode_index']
 
-                self.dataset.add_frame(frame, task=task)
-            self.dataset.save_episode()
\ No newline at end of file
+            episode_buffer['index'] = np.arange(meta.total_frames, meta.total_frames + episode_length)
+            episode_buffer['episode_index'] = np.full((episode_length,), episode_index)
+            for task in episode_tasks:
+                if meta.get_task_index(task) is None:
+                    meta.add_task(task)
+            episode_buffer['task_index'] = np.array([meta.get_task_index(task) for task in tasks])
+
+            for key, feature in dataset.features.items():
+                if key in ('index', 'episode_index', 'task_index') or feature['dtype'] in ('image', 'video'):
+                    continue
+                episode_buffer[key] = np.stack(episode_buffer[key])
+
+            if self.config.direct_parquet and supports_direct_parquet(dataset.hf_features):
+                # the episode is not appended to the in-memory hf_dataset, the converter never reads it back
+                write_episode_parquet(
+                    episode_buffer, dataset.hf_features, dataset.root / meta.get_data_file_path(ep_index=episode_index)
+                )
+            else:
+                dataset._save_episode_table(episode_buffer, episode_index)
+            if video_stats is not None:
+                episode_stats = compute_episode_stats(
+                    {key: value for key, value in episode_buffer.items() if key not in video_stats}, dataset.features
+                )
+                episode_stats.update(video_stats)
+                # same key order as the stats of save_episode
+                episode_stats = {key: episode_stats[key] for key in episode_buffer if key in episode_stats}
+                if episode_index == 0:
+                    meta.update_video_info()
+                    write_info(meta.info, dataset.root)
+            else:
+                episode_stats = compute_episode_stats(episode_buffer, dataset.features)
+                if len(meta.video_keys) > 0:
+                    # only removes the images of this episode, the next one is being written meanwhile
+                    dataset.encode_episode_videos(episode_index)
+            meta.save_episode(episode_index, episode_length, episode_tasks, episode_stats)
+
+        self._record_source(episode_index, source)
+
+    def _get_writer_backlog(self, shared=False):
+        """
+        Bytes of images waiting in the image writer queue. Writer processes receive pickled copies,
+        writer threads share the frame arrays, which only count once the frames are no longer charged (`shared`).
+        """
+        writer = self.dataset.image_writer
+        if writer is None or (writer.num_processes == 0 and not shared):
+            return 0
+        if self._queued_image_nbytes is None:
+            shapes = [feature['shape'] for feature in self.dataset.features.values() if feature['dtype'] in ('image', 'video')]
+            self._queued_image_nbytes = int(np.mean([np.prod(shape) for shape in shapes])) if shapes else 0
+        try:
+            return writer.queue.qsize() * self._queued_image_nbytes
+        except NotImplementedError:
+            # multiprocessing queues have no qsize on macOS
+            return 0
+
+    def add_episode(self, data: Dict[str, Any], tasks: List[str]):
+        """
+        Append frames given as (N, ...) columns to the episode buffer, the bulk counterpart of LeRobotDataset.add_frame.
+        Features are validated once, low-dim columns are appended as whole arrays and the images are queued for
+        the image writer in one pass. Encoded images are written to disk unchanged, loading and stats computation
+        open them with PIL, which detects the format from the content. With `stream_video` the video frames
+        go to the video writer instead.
+        """
+        dataset = self.dataset
+        if dataset.episode_buffer is None:
+            dataset.episode_buffer = dataset.create_episode_buffer()
+        episode_buffer = dataset.episode_buffer
+        num_frames = len(tasks)
+
+        error_message = validate_features_presence(set(data), set(dataset.features) - set(DEFAULT_FEATURES))
+        for key, value in data.items():
+            if len(value) != num_frames:
+                error_message += f'The feature \'{key}\' has {len(value)} frames, expected {num_frames}.\n'
+            elif key in dataset.features and not isinstance(value[0], EncodedImage):
+                # frames of a column share their dtype and shape, checking the first one covers all
+                error_message += validate_feature_dtype_and_shape(key, dataset.features[key], value[0])
+        if error_message:
+            raise ValueError(error_message)
+
+        start = episode_buffer['size']
+        frame_index = np.arange(start, start + num_frames)
+        _extend_column(episode_buffer, 'frame_index', frame_index)
+        _extend_column(episode_buffer, 'timestamp', frame_index / dataset.fps)
+        episode_buffer['task'].extend(tasks)
+
+        for key, value in data.items():
+            if dataset.features[key]['dtype'] not in ('image', 'video'):
+                _extend_column(episode_buffer, key, np.asarray(value))
+                continue
+
+            if self.video_writer is not None and key in dataset.meta.video_keys:
+                # the column stays empty, the frames only exist in the video
+                self.video_writer.add_frames(key, [
+                    imageio.v3.imread(image.data) if isinstance(image, EncodedImage) else image for image in value
+                ])
+                continue
+
+            for i, image in zip(frame_index, value):
+                image_path = dataset._get_image_file_path(
+                    episode_index=episode_buffer['episode_index'], image_key=key, frame_index=i
+                )
+                if i == 0:
+                    image_path.parent.mkdir(parents=True, exist_ok=True)
+                if isinstance(image, EncodedImage):
+                    image_path = image_path.with_suffix(image.suffix)
+                    image_path.write_bytes(image.data)
+                else:
+                    dataset._save_image(image, image_path)
+                episode_buffer[key].append(str(image_path))
+        episode_buffer['size'] += num_frames
@@ -1,30 +1,136 @@
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
+
+
+JOINT_LAYOUT = [
+    {'name': 'left_joint', 'range': (50, 57)},
+    {'name': 'left_gripper', 'range': (60, 61)},
+    {'name': 'right_joint', 'range': (0, 7)},
+    {'name': 'right_gripper', 'range': (10, 11)},
+]
+
+POSE_LAYOUT = [
+    {'name': 'left_xyz', 'range': (80, 83)},
+    {'name': 'left_rpy', 'range': (83, 89)},
+    {'name': 'left_gripper', 'range': (60, 61)},
+    {'name': 'right_xyz', 'range': (30, 33)},
+    {'name': 'right_rpy', 'range': (33, 39)},
+    {'name': 'right_gripper', 'range': (10, 11)},
+]
+
+JOINT_AND_POSE_LAYOUT = [
+    {'name': 'left_joint', 'range': (50, 57)},    # [0, 7)
+    {'name': 'left_gripper', 'range': (60, 61)},  # [7, 8)
+    {'name': 'left_xyz', 'range': (80, 83)},      # [8, 11)
+    {'name': 'left_rpy', 'range': (83, 89)},      # [11, 17)
+    {'name': 'right_joint', 'range': (0, 7)},     # [17, 24)
+    {'name': 'right_gripper', 'range': (10, 11)}, # [24, 25)
+    {'name': 'right_xyz', 'range': (30, 33)},     # [25, 28)
+    {'name': 'right_rpy', 'range': (33, 39)},     # [28, 34)
+]
 
 
 @dataclass
 class DataConvertorConfig:
     overwrite: bool = True
     check_only: bool = False
+    # reopen an existing dataset and skip the sources it already contains (ignores `overwrite`)
+    resume: bool = False
+    # skip sources that fail to read or write, recording them with their traceback in `quarantine_report_path`
+    # (meta/quarantine.json of the dataset by default). The run aborts once more than `max_failures` failed,
+    # 0 aborts on the first failure
+    max_failures: int = 0
+    quarantine_report_path: Optional[str] = None
+    # time the read / create_dataset / add_episode / save_episode stages, print a summary and write it as JSON
+    profile_stages: bool = False
+    profile_episodes: bool = False
+    profile_report_path: Optional[str] = None
 
     repo_id: str = 'realman/test'
     data_root: Optional[str] = None
     fps: int = 30
     video_backend: str = 'pyav'
+    # encoder settings of the videos, one of `VIDEO_PROFILES` ('default', 'fast-ingest', 'archive', 'random-access'),
+    # recorded in info.json. None keeps lerobot's encoder
+    video_profile: Optional[str] = None
+    # fields of the profile to override, e.g. {'crf': 25, 'threads': 4}
+    video_options: Optional[Dict[str, Any]] = None
+    # encode the frames into the videos as they are added, one encoder per camera, instead of writing
+    # PNG images and encoding them when the episode is saved. Uses the 'default' profile when none is set
+    stream_video: bool = False
     image_writer_processes: int = 1
     image_writer_threads: int = 1
+    # save episodes (stats, parquet, video encoding, metadata) on a background thread while the next one is converted,
+    # waiting when `max_pending_saves` episodes are being saved
+    async_save: bool = False
+    max_pending_saves: int = 1
+    # write each episode's parquet straight from the NumPy columns with pyarrow instead of through `datasets`,
+    # datasets with image (not video) features keep the `datasets` path
+    direct_parquet: bool = False
+    # bytes of decoded frames in flight between reading and writing, reading pauses above it (0 for no limit)
+    memory_budget: int = 0
+    # decode whole episodes into uint8 frame arenas that are reused across episodes instead of fresh arrays,
+    # keeping the heap from fragmenting over long runs (read in the main process only, not with read workers)
+    frame_pool: bool = False
+
+    # output dtypes of low-dim features, e.g. {'observation.state': 'float32', 'action': 'float32'}
+    # None keeps the source dtypes. A warning is printed when a cast loses more than `dtype_tolerance`
+    dtypes: Optional[Dict[str, str]] = None
+    dtype_tolerance: float = 1e-3
 
     image_prefix: str = 'observation.images'
     default_task: str = 'do something'
 
+    # per-camera crop and resize applied while decoding, e.g. {'observation.images.cam_left_wrist': {'size': (224, 224)}}
+    # crop is (top, left, height, width) in source pixels and is applied before resizing to size (height, width)
+    image_transforms: Optional[Dict[str, dict]] = None
+
+    # segments of the source state and action vectors kept in the output, see `JOINT_AND_POSE_LAYOUT`
+    # None keeps the source vectors unchanged
+    state_layout: Optional[List[dict]] = None
+
 
 @dataclass
 class HDF5DataConvertorConfig(DataConvertorConfig):
     root: str = ''
+    state_layout: Optional[List[dict]] = field(default_factory=lambda: list(JOINT_AND_POSE_LAYOUT))
+    # parse episodes in worker processes when > 0, keeping at most `prefetch_episodes` in flight
+    num_read_workers: int = 0
+    prefetch_episodes: int = 2
+    # decode each camera on a thread pool into one preallocated array when > 0, otherwise frame by frame
+    image_decode_threads: int = 0
+    # yield lazy episodes read `stream_chunk_size` frames at a time when > 0 (takes precedence over read workers)
+    stream_chunk_size: int = 0
+    # write the compressed camera frames to the dataset unchanged (image mode only, requires video_backend='none')
+    image_passthrough: bool = False
+    # raw chunk cache per open HDF5 file in bytes, 0 keeps the h5py default (1 MiB)
+    chunk_cache_size: int = 0
+    # read image records straight from the stored chunks when every chunk holds whole records (raw or gzip only)
+    direct_chunk_read: bool = False
+    # drop the leading and trailing frames where no dimension of the state or action moves faster than
+    # `idle_velocity_threshold` (units per second), keeping `idle_margin` frames of them, before any image is decoded
+    trim_idle: bool = False
+    idle_velocity_threshold: float = 0.01
+    idle_margin: int = 0
+    # persistent index of the HDF5 files under `root`, refreshed incrementally instead of walking and opening every file
+    manifest_path: Optional[str] = None
+    # JSON summary written by `check_only` runs
+    check_report_path: Optional[str] = None
+    # convert only the contiguous block `shard_index` of the sorted files into its own partial dataset,
+    # merged afterwards with scripts/consolidate_shards.py
+    num_shards: int = 1
+    shard_index: int = 0
 
 
 @dataclass
 class LeRobotDataConvertorConfig(DataConvertorConfig):
     source_repo_id: str = ''
-    source_video_backend: str = 'pyav'
\ No newline at end of file
+    source_video_backend: str = 'pyav'
+    # the source is a converted HDF5 dataset in `JOINT_AND_POSE_LAYOUT`, keep its joints and grippers
+    state_layout: Optional[List[dict]] = field(default_factory=lambda: [
+        {'name': 'left_joint', 'range': (0, 7)},
+        {'name': 'left_gripper', 'range': (7, 8)},
+        {'name': 'right_joint', 'range': (17, 24)},
+        {'name': 'right_gripper', 'range': (24, 25)},
+    ])
@@ -0,0 +1,42 @@
+import numpy as np
+from typing import Dict, Optional
+
+
+class DtypePolicy:
+    """
+    Output dtypes of low-dim features, e.g. {'observation.state': 'float32'}, applied to whole columns.
+    The largest absolute error of each cast is tracked, a warning is printed the first time a feature
+    loses more than `tolerance`.
+    """
+    def __init__(self, dtypes: Optional[Dict[str, str]] = None, tolerance: float = 1e-3):
+        self.dtypes = {key: np.dtype(dtype) for key, dtype in (dtypes or {}).items()}
+        self.tolerance = tolerance
+        self.max_errors = {}
+
+    def get_dtype(self, key: str, dtype: np.dtype) -> np.dtype:
+        return self.dtypes.get(key, dtype)
+
+    def __call__(self, data: dict, source: Optional[str] = None) -> dict:
+        if not self.dtypes:
+            return data
+        data = dict(data)
+        for key, dtype in self.dtypes.items():
+            value = data.get(key)
+            if value is None or value.dtype == dtype:
+                continue
+            cast = value.astype(dtype)
+            with np.errstate(over='ignore', invalid='ignore'):
+                # overflow shows up as an infinite error, NaNs stay NaNs and are ignored
+                error = float(np.nanmax(np.abs(cast.astype(value.dtype) - value), initial=0))
+            if error > self.tolerance and self.max_errors.get(key, 0) <= self.tolerance:
+                print(f'Warning: casting {key} from {value.dtype} to {dtype} loses up to {error:.3g} '
+                      f'(tolerance {self.tolerance:.3g}) in {source}.')
+            self.max_errors[key] = max(self.max_errors.get(key, 0), error)
+            data[key] = cast
+        return data
+
+    def report(self):
+        for key, error in self.max_errors.items():
+            if error > self.tolerance:
+                print(f'Warning: {key} was cast to {self.dtypes[key]} with a maximum error of {error:.3g} '
+                      f'(tolerance {self.tolerance:.3g}).')
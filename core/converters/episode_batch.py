@@ -0,0 +1,65 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+
+class EpisodeBatch:
+    """
+    Columnar episode: a dict of (N, ...) arrays plus a per-frame task column.
+    Writers consume it by slicing, iterating yields per-frame dicts with a 'task' key for old code.
+    """
+    def __init__(self, data: Dict[str, Any], tasks: Optional[List[str]] = None, source: Optional[str] = None):
+        self.data = data
+        self.tasks = tasks
+        self.source = source
+
+    @classmethod
+    def from_columns(cls, output: Dict[str, Any], source: Optional[str] = None):
+        # {'a': (N, ...), 'task': [...]} -> EpisodeBatch
+        output = dict(output)
+        tasks = output.pop('task', None)
+        return cls(output, tasks=None if tasks is None else list(tasks), source=source)
+
+    @classmethod
+    def from_frames(cls, frames: List[Dict[str, Any]], source: Optional[str] = None):
+        # [{'a': (...), 'task': ...}, ...] -> EpisodeBatch
+        keys = [key for key in frames[0].keys() if key != 'task']
+        data = {key: np.stack([frame[key] for frame in frames]) for key in keys}
+        tasks = [frame['task'] for frame in frames] if 'task' in frames[0] else None
+        return cls(data, tasks=tasks, source=source)
+
+    def __len__(self):
+        return len(next(iter(self.data.values())))
+
+    @property
+    def nbytes(self) -> int:
+        # memory held by the frames, passthrough images count their compressed size
+        total = 0
+        for value in self.data.values():
+            if isinstance(value, np.ndarray):
+                total += value.nbytes
+            else:
+                total += sum(item.nbytes if isinstance(item, np.ndarray) else len(item.data) for item in value)
+        return total
+
+    def frame(self, index: int) -> Dict[str, Any]:
+        return {key: value[index] for key, value in self.data.items()}
+
+    def slice(self, start: int, stop: int) -> 'EpisodeBatch':
+        return EpisodeBatch(
+            {key: value[start:stop] for key, value in self.data.items()},
+            tasks=None if self.tasks is None else self.tasks[start:stop],
+            source=self.source,
+        )
+
+    def iter_batches(self):
+        yield self
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        frame = self.frame(index)
+        if self.tasks is not None:
+            frame['task'] = self.tasks[index]
+        return frame
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
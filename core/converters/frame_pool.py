@@ -0,0 +1,54 @@
+import math
+import numpy as np
+from collections import defaultdict
+from typing import Tuple
+
+
+class FramePool:
+    """
+    Reusable arenas for decoded frames, keyed by frame shape and dtype. `acquire` returns an (N, H, W, C) view
+    of a free arena holding at least N frames and only allocates when none fits, rounding the capacity up to
+    `granularity` frames so that slightly longer episodes still fit. Arenas go back to the pool with `release_all`
+    once the writer no longer reads their frames.
+    """
+    def __init__(self, granularity: int = 128):
+        self.granularity = granularity
+        self._free = defaultdict(list)
+        self._in_use = []
+        self.stats = {
+            'acquired': 0,
+            'reused': 0,
+            'allocated': 0,
+            'allocated_bytes': 0,
+            'pooled_bytes': 0,
+            'in_use_bytes_peak': 0,
+        }
+
+    def acquire(self, num_frames: int, frame_shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        key = (tuple(frame_shape), np.dtype(dtype))
+        free = self._free[key]
+        # arrays compare element-wise, free arenas are picked by index
+        fits = [i for i, arena in enumerate(free) if len(arena) >= num_frames]
+        self.stats['acquired'] += 1
+        if fits:
+            arena = free.pop(min(fits, key=lambda i: len(free[i])))
+            self.stats['reused'] += 1
+        else:
+            if free:
+                # no free arena is large enough, the smallest is dropped so the pool does not keep growing
+                smallest = free.pop(min(range(len(free)), key=lambda i: len(free[i])))
+                self.stats['pooled_bytes'] -= smallest.nbytes
+            capacity = math.ceil(max(num_frames, 1) / self.granularity) * self.granularity
+            arena = np.empty((capacity,) + key[0], dtype=key[1])
+            self.stats['allocated'] += 1
+            self.stats['allocated_bytes'] += arena.nbytes
+            self.stats['pooled_bytes'] += arena.nbytes
+        self._in_use.append(arena)
+        in_use_bytes = sum(arena.nbytes for arena in self._in_use)
+        self.stats['in_use_bytes_peak'] = max(self.stats['in_use_bytes_peak'], in_use_bytes)
+        return arena[:num_frames]
+
+    def release_all(self):
+        for arena in self._in_use:
+            self._free[(arena.shape[1:], arena.dtype)].append(arena)
+        self._in_use.clear()
@@ -1,11 +1,24 @@
+import contextlib
 import io
 import h5py
+import itertools
+import json
 import numpy as np
 import os
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
 from PIL import Image
 
-from .base_data_convertor import BaseDataConvertor
-from .configuration_data_convertor import HDF5DataConvertorConfig
+from .base_data_convertor import BaseDataConvertor, EncodedImage
+from .configuration_data_convertor import HDF5DataConvertorConfig, JOINT_AND_POSE_LAYOUT, JOINT_LAYOUT, POSE_LAYOUT
+from .episode_batch import EpisodeBatch
+from .idle_trim import find_active_range
+from .image_transform import get_image_transform
+from .sharding import get_shard, get_shard_name
+from .source_manifest import SourceManifest
+from .state_layout import compile_layout
 
 _TASK_MAPPING = {
     'basket_towel': 'put the towel into in basket.',
@@ -16,84 +29,510 @@ _TASK_MAPPING = {
 }
 
 
-def decode_image(image_buffer):
+def decode_image(image_buffer, transform=None):
+    if transform is not None:
+        return transform.decode(image_buffer)
     img = Image.open(io.BytesIO(image_buffer))
     return np.array(img)
 
 
+def probe_image_shape(image_buffer):
+    # only parses the header, the image data is not decoded
+    with Image.open(io.BytesIO(image_buffer)) as img:
+        return (img.height, img.width, len(img.getbands()))
+
+
+def decode_images(image_buffers, num_threads=1, transform=None, frame_pool=None):
+    """
+    Decode all frames of a camera into one preallocated (N, H, W, C) array, taken from `frame_pool` when given.
+    PIL releases the GIL while decoding, so frames are decoded on a thread pool.
+    """
+    first = decode_image(image_buffers[0], transform)
+    if frame_pool is not None:
+        images = frame_pool.acquire(len(image_buffers), first.shape, first.dtype)
+    else:
+        images = np.empty((len(image_buffers),) + first.shape, dtype=first.dtype)
+    images[0] = first
+
+    def decode_range(start, stop):
+        for i in range(start, stop):
+            if transform is not None:
+                images[i] = transform.decode(image_buffers[i])
+                continue
+            with Image.open(io.BytesIO(image_buffers[i])) as img:
+                images[i] = np.asarray(img)
+
+    if num_threads <= 1:
+        decode_range(1, len(image_buffers))
+        return images
+
+    # a few ranges per thread amortize the executor overhead while keeping the load balanced
+    bounds = np.linspace(1, len(image_buffers), num_threads * 4 + 1).astype(int)
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        list(executor.map(decode_range, bounds[:-1], bounds[1:]))
+    return images
+
+
 def extract_joint(state):
-    return np.concatenate([
-        state[..., 50:57], # left joint
-        state[..., 60:61], # left gripper
-        state[..., 0:7],   # right joint
-        state[..., 10:11], # right gripper
-    ], axis=-1)
+    return compile_layout(JOINT_LAYOUT)(state)
 
 
 def extract_pose(state):
-    return np.concatenate([
-        state[..., 80:83], # left xyz
-        state[..., 83:89], # left rpy
-        state[..., 60:61], # left gripper
-        state[..., 30:33], # right xyz
-        state[..., 33:39], # right rpy
-        state[..., 10:11], # right gripper
-    ], axis=-1)
+    return compile_layout(POSE_LAYOUT)(state)
 
 
 def extract_joint_and_pose(state):
-    return np.concatenate([
-        state[..., 50:57], # left joint [0, 7)
-        state[..., 60:61], # left gripper [7, 8)
-        state[..., 80:83], # left xyz [8, 11)
-        state[..., 83:89], # left rpy [11, 17)
-        state[..., 0:7],   # right joint [17, 24)
-        state[..., 10:11], # right gripper [24, 25)
-        state[..., 30:33], # right xyz [25, 28)
-        state[..., 33:39], # right rpy [28, 34)
-    ], axis=-1)
-
-
-def parse_hdf5(f, hdf5_path):
-    def as_frames(output):
-        # {'a': (N, ...), 'b': (N, ...)} -> [{'a': (...), 'b': (...)}, ...]
-        return [dict(zip(output.keys(), t)) for t in zip(*output.values())]
+    return compile_layout(JOINT_AND_POSE_LAYOUT)(state)
+
+
+def get_task_folder(hdf5_path):
+    return hdf5_path.replace('\\', '/').split('/')[-2]
+
+
+def get_task(hdf5_path):
+    return _TASK_MAPPING[get_task_folder(hdf5_path)]
+
+
+def open_hdf5(hdf5_path, config: HDF5DataConvertorConfig = None):
+    kwargs = dict()
+    if config is not None and config.chunk_cache_size > 0:
+        # reads are sequential, so fully read chunks are evicted first
+        kwargs.update(rdcc_nbytes=config.chunk_cache_size, rdcc_w0=1.0)
+    return h5py.File(hdf5_path, 'r', **kwargs)
+
+
+def can_read_direct_chunks(dataset):
+    return (
+        dataset.chunks is not None
+        and dataset.ndim == 2
+        and dataset.dtype == np.uint8
+        and dataset.chunks[1] == dataset.shape[1]
+        and dataset.compression in (None, 'gzip')
+        and not dataset.shuffle
+        and not dataset.fletcher32
+        and dataset.scaleoffset is None
+    )
+
+
+def read_direct_chunks(dataset, start=None, stop=None):
+    """
+    Read records [start, stop) of a 2D uint8 dataset chunk by chunk with `read_direct_chunk`,
+    bypassing the HDF5 filter pipeline and the element-wise copy into the selection.
+    Records are returned as memoryviews into the (decompressed) chunks.
+    """
+    start, stop, _ = slice(start, stop).indices(len(dataset))
+    rows_per_chunk, record_size = dataset.chunks
+    gzip = dataset.compression == 'gzip'
+
+    records = []
+    for chunk_start in range(start - start % rows_per_chunk, stop, rows_per_chunk):
+        filter_mask, data = dataset.id.read_direct_chunk((chunk_start, 0))
+        # bit 0 of the mask is set when the gzip filter was skipped for this chunk
+        if gzip and not filter_mask & 1:
+            data = zlib.decompress(data)
+        view = memoryview(data)
+        for i in range(max(start, chunk_start), min(stop, chunk_start + rows_per_chunk)):
+            offset = (i - chunk_start) * record_size
+            records.append(view[offset:offset + record_size])
+    return records
+
+
+def read_image_records(dataset, start=None, stop=None, direct=False):
+    if direct and can_read_direct_chunks(dataset):
+        return read_direct_chunks(dataset, start, stop)
+    return dataset[start:stop]
+
+
+def is_raw_image_dataset(dataset):
+    # decoded (N, H, W, C) uint8 frames instead of encoded records
+    return dataset.ndim == 4 and dataset.dtype == np.uint8
+
+
+def can_memmap(dataset):
+    # contiguous storage is never filtered, get_offset is None until the data is written
+    return (
+        dataset.chunks is None
+        and dataset.external is None
+        and dataset.file.driver in ('sec2', 'stdio')
+        and dataset.id.get_offset() is not None
+    )
+
+
+def read_raw_images(dataset, start=None, stop=None, transform=None):
+    """
+    Frames [start, stop) of a raw image dataset. Contiguous datasets are returned as a read-only
+    np.memmap view at the dataset's offset in the file: nothing is copied or decoded here,
+    pages are read when the writer touches the frames.
+    """
+    if can_memmap(dataset):
+        images = np.memmap(
+            dataset.file.filename, dtype=dataset.dtype, mode='r', offset=dataset.id.get_offset(), shape=dataset.shape
+        )[start:stop]
+    else:
+        images = dataset[start:stop]
+    if transform is not None:
+        images = np.stack([transform(image) for image in images])
+    return images
+
+
+def get_image_shape(dataset):
+    if is_raw_image_dataset(dataset):
+        return tuple(dataset.shape[1:])
+    return probe_image_shape(dataset[0])
+
+
+def read_hdf5(f, hdf5_path, config: HDF5DataConvertorConfig = None, start=None, stop=None, frame_pool=None):
+    """
+    Read and decode frames [start, stop) of an episode as an EpisodeBatch.
+    With a `frame_pool`, every camera is decoded into an arena of the pool instead of a new array.
+    """
+    decode_threads = config.image_decode_threads if config is not None else 0
+    passthrough = config.image_passthrough if config is not None else False
+    direct = config.direct_chunk_read if config is not None else False
+    image_transforms = config.image_transforms if config is not None else None
+    layout = compile_layout(config.state_layout if config is not None else JOINT_AND_POSE_LAYOUT)
+
+    state = f['observations']['qpos'][start:stop]
+    action = f['action'][start:stop]
 
     images = dict()
-    for key in f['observations']['images'].keys():
-        images[key] = [decode_image(img) for img in f['observations']['images'][key][:]]
-    state = f['observations']['qpos'][:]
-    action = f['action'][:]
+    for key, dataset in f['observations']['images'].items():
+        if len(state) == 0:
+            # episodes trimmed down to nothing are skipped by the writer, no camera is read
+            break
+        transform = get_image_transform(image_transforms, f'observation.images.{key}')
+        if is_raw_image_dataset(dataset):
+            # raw frames have nothing to pass through, they are written like decoded frames
+            images[key] = read_raw_images(dataset, start, stop, transform)
+            continue
+        buffers = read_image_records(dataset, start, stop, direct)
+        if passthrough:
+            shape = probe_image_shape(buffers[0])
+            # fixed-length records are zero padded, JPEG and PNG streams never end with a zero byte
+            images[key] = [EncodedImage(bytes(buffer).rstrip(b'\x00'), shape) for buffer in buffers]
+        elif decode_threads > 0 or frame_pool is not None:
+            images[key] = decode_images(buffers, decode_threads, transform, frame_pool)
+        else:
+            images[key] = [decode_image(img, transform) for img in buffers]
 
     output = {
-        'observation.state': extract_joint_and_pose(state),
-        'action': extract_joint_and_pose(action),
+        'observation.state': state if layout is None else layout(state),
+        'action': action if layout is None else layout(action),
     }
     for key, value in images.items():
-        output[f'observation.images.{key}'] = np.array(value)
+        output[f'observation.images.{key}'] = value if passthrough else np.asarray(value)
     
-    task = hdf5_path.replace('\\', '/').split('/')[-2]
-    task = _TASK_MAPPING[task]
-    output['task'] = [task for _ in range(len(state))]
+    task = get_task(hdf5_path)
+    tasks = [task for _ in range(len(state))]
+
+    return EpisodeBatch(output, tasks=tasks, source=hdf5_path)
+
+
+def get_active_range(f, config: HDF5DataConvertorConfig = None):
+    """
+    Frames [start, stop) of the episode left after trimming the idle frames at both ends, from the full
+    state and action arrays. Without `trim_idle` the whole episode.
+    """
+    length = len(f['observations']['qpos'])
+    if config is None or not config.trim_idle:
+        return 0, length
+    layout = compile_layout(config.state_layout)
+    state = f['observations']['qpos'][:]
+    action = f['action'][:]
+    if layout is not None:
+        state, action = layout(state), layout(action)
+    return find_active_range(state, action, config.fps, config.idle_velocity_threshold, config.idle_margin)
+
 
-    return as_frames(output)
+def parse_hdf5(f, hdf5_path, config: HDF5DataConvertorConfig = None, frame_pool=None):
+    start, stop = get_active_range(f, config)
+    return read_hdf5(f, hdf5_path, config, start, stop, frame_pool)
+
+
+class HDF5Episode:
+    """
+    Lazy episode backed by an open HDF5 file.
+    Frames are read and decoded `stream_chunk_size` at a time, so peak memory
+    depends on the chunk size instead of the episode length.
+    """
+    def __init__(self, f, hdf5_path, config: HDF5DataConvertorConfig):
+        self.f = f
+        self.source = hdf5_path
+        self.config = config
+        # idle frames at both ends are never read
+        self.offset, stop = get_active_range(f, config)
+        self.length = stop - self.offset
+
+    def __len__(self):
+        return self.length
+
+    def slice(self, start, stop):
+        return read_hdf5(self.f, self.source, self.config, self.offset + start, self.offset + stop)
+
+    def frame(self, index):
+        return self.slice(index, index + 1).frame(0)
+
+    def iter_batches(self):
+        chunk_size = self.config.stream_chunk_size
+        for start in range(0, self.length, chunk_size):
+            yield self.slice(start, min(start + chunk_size, self.length))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError(f'Frame index {index} out of range for episode of length {self.length}.')
+        return self.slice(index, index + 1)[0]
+
+    def __iter__(self):
+        for batch in self.iter_batches():
+            yield from batch
+
+
+def load_hdf5(hdf5_path, config: HDF5DataConvertorConfig = None, frame_pool=None):
+    with open_hdf5(hdf5_path, config) as f:
+        return parse_hdf5(f, hdf5_path, config, frame_pool)
+
+
+def probe_hdf5(hdf5_path):
+    # reads dataset shapes and one compressed record per camera, no frame is decoded
+    with h5py.File(hdf5_path, 'r') as f:
+        cameras = dict()
+        for key, dataset in f['observations']['images'].items():
+            cameras[key] = list(get_image_shape(dataset))
+        return {
+            'length': len(f['observations']['qpos']),
+            'cameras': cameras,
+            'task': _TASK_MAPPING.get(get_task_folder(hdf5_path)),
+        }
+
+
+def validate_hdf5(hdf5_path, config: HDF5DataConvertorConfig = None):
+    """
+    Check an episode from its metadata: frame counts of qpos, action and every camera match,
+    the task folder is known and the state covers the layout. Only one frame per camera is decoded.
+    """
+    result = {'path': hdf5_path, 'length': None, 'cameras': {}, 'errors': []}
+    errors = result['errors']
+
+    task_folder = get_task_folder(hdf5_path)
+    if task_folder not in _TASK_MAPPING:
+        errors.append(f'unknown task folder {task_folder}')
+
+    try:
+        with open_hdf5(hdf5_path, config) as f:
+            state = f['observations']['qpos']
+            action = f['action']
+            result['length'] = len(state)
+
+            if len(action) != len(state):
+                errors.append(f'action has {len(action)} frames, qpos has {len(state)}')
+            if action.shape[1:] != state.shape[1:]:
+                errors.append(f'action shape {action.shape[1:]} differs from qpos shape {state.shape[1:]}')
+
+            layout = compile_layout(config.state_layout if config is not None else JOINT_AND_POSE_LAYOUT)
+            if layout is not None and layout.indices.max() >= state.shape[-1]:
+                errors.append(f'qpos has {state.shape[-1]} dims, the state layout reads index {layout.indices.max()}')
+
+            if len(f['observations']['images']) == 0:
+                errors.append('no cameras')
+            for key, dataset in f['observations']['images'].items():
+                if len(dataset) != len(state):
+                    errors.append(f'camera {key} has {len(dataset)} frames, qpos has {len(state)}')
+                try:
+                    if is_raw_image_dataset(dataset):
+                        result['cameras'][key] = list(dataset[0].shape)
+                    else:
+                        result['cameras'][key] = list(decode_image(dataset[0]).shape)
+                except Exception as e:
+                    errors.append(f'camera {key} failed to decode: {e!r}')
+    except Exception as e:
+        errors.append(f'failed to read: {e!r}')
+
+    return result
+
+
+def find_hdf5_paths(root):
+    hdf5_paths = []
+    for dirpath, dirs, files in os.walk(root):
+        for file in files:
+            if file.endswith('.hdf5') or file.endswith('.h5'):
+                hdf5_paths.append(os.path.join(dirpath, file))
+
+    hdf5_paths.sort()
+    return hdf5_paths
 
 
 class HDF5DataConvertor(BaseDataConvertor):
     def __init__(self, config: HDF5DataConvertorConfig):
+        if config.image_passthrough and config.video_backend != 'none':
+            raise ValueError('image_passthrough requires video_backend="none", videos are encoded from decoded frames.')
+        if config.image_passthrough and config.image_transforms:
+            raise ValueError('image_passthrough stores the source images unchanged, it cannot be combined with image_transforms.')
+        if config.num_shards > 1:
+            # every shard writes its own partial dataset next to the final one
+            config = replace(
+                config,
+                repo_id=get_shard_name(config.repo_id, config.num_shards, config.shard_index),
+                data_root=get_shard_name(config.data_root, config.num_shards, config.shard_index),
+            )
         super().__init__(config)
+        self.manifest = None
     
+    def _find_hdf5_paths(self):
+        # absolute paths identify the sources across runs, see `resume`
+        root = os.path.abspath(self.config.root)
+        if self.config.manifest_path is None:
+            hdf5_paths = find_hdf5_paths(root)
+            return get_shard(hdf5_paths, self.config.num_shards, self.config.shard_index)
+
+        manifest = SourceManifest(root, self.config.manifest_path, probe_hdf5, ('.hdf5', '.h5'))
+        manifest.refresh()
+        manifest.save()
+        self.manifest = manifest
+        print(f'Found {len(manifest.entries)} episodes with {manifest.total_frames()} frames '
+              f'({manifest.num_probed} new or changed files probed).')
+        return get_shard(manifest.paths(), self.config.num_shards, self.config.shard_index)
+
+    def check(self):
+        """
+        Validate every HDF5 file from its metadata and print a summary report,
+        also written as JSON to `check_report_path` when set.
+        """
+        hdf5_paths = self._find_hdf5_paths()
+
+        if self.config.num_read_workers > 0:
+            with ProcessPoolExecutor(max_workers=self.config.num_read_workers) as executor:
+                chunksize = max(1, len(hdf5_paths) // (self.config.num_read_workers * 16))
+                results = list(executor.map(
+                    validate_hdf5, hdf5_paths, itertools.repeat(self.config), chunksize=chunksize))
+        else:
+            results = [validate_hdf5(path, self.config) for path in hdf5_paths]
+
+        invalid = [result for result in results if result['errors']]
+        valid = [result for result in results if not result['errors']]
+
+        tasks, cameras = dict(), dict()
+        for result in valid:
+            task = _TASK_MAPPING[get_task_folder(result['path'])]
+            tasks[task] = tasks.get(task, 0) + 1
+            for key, shape in result['cameras'].items():
+                shapes = cameras.setdefault(key, [])
+                if shape not in shapes:
+                    shapes.append(shape)
+
+        report = {
+            'num_files': len(results),
+            'num_valid': len(valid),
+            'num_invalid': len(invalid),
+            'num_frames': sum(result['length'] for result in valid),
+            'tasks': tasks,
+            'cameras': cameras,
+            'invalid': invalid,
+        }
+
+        print(f'Checked {report["num_files"]} files: {report["num_valid"]} valid, {report["num_invalid"]} invalid, '
+              f'{report["num_frames"]} frames in valid files.')
+        for task, count in tasks.items():
+            print(f'  {count:6d} episodes: {task}')
+        for key, shapes in cameras.items():
+            print(f'  camera {key}: {", ".join(str(tuple(shape)) for shape in shapes)}')
+        for result in invalid:
+            print(f'Invalid {result["path"]}:')
+            for error in result['errors']:
+                print(f'  - {error}')
+
+        if self.config.check_report_path is not None:
+            with open(self.config.check_report_path, 'w') as f:
+                json.dump(report, f, indent=4)
+
+        return report
+
     def _yield_episodes(self):
-        hdf5_paths = []
-        for root, dirs, files in os.walk(self.config.root):
-            for file in files:
-                if file.endswith('.hdf5') or file.endswith('.h5'):
-                    hdf5_paths.append(os.path.join(root, file))
-        
-        hdf5_paths.sort()
+        # skip converted files before they are read
+        hdf5_paths = [path for path in self._find_hdf5_paths() if path not in self.completed_sources]
+
+        if self.config.stream_chunk_size > 0:
+            # the file stays open while the consumer iterates over the episode
+            for hdf5_path in hdf5_paths:
+                with contextlib.ExitStack() as stack:
+                    try:
+                        f = stack.enter_context(open_hdf5(hdf5_path, self.config))
+                        episode = HDF5Episode(f, hdf5_path, self.config)
+                    except Exception as e:
+                        self._quarantine(hdf5_path, e)
+                        continue
+                    yield episode
+            return
+
+        if self.config.num_read_workers > 0:
+            yield from self._yield_episodes_parallel(hdf5_paths)
+            return
 
         for hdf5_path in hdf5_paths:
-            with h5py.File(hdf5_path, 'r') as f:
-                result = parse_hdf5(f, hdf5_path)
-            
-            yield result
\ No newline at end of file
+            try:
+                episode = load_hdf5(hdf5_path, self.config, self.frame_pool)
+            except Exception as e:
+                # the previous episode released its arenas once written, these are the ones of the failed read
+                self._release_frames()
+                self._quarantine(hdf5_path, e)
+                continue
+            yield episode
+
+    def _estimate_episode_nbytes(self, hdf5_path):
+        # decoded size of the cameras, from the manifest when available, otherwise from the file headers
+        info = self.manifest.get(hdf5_path) if self.manifest is not None else None
+        try:
+            if info is None or 'error' in info:
+                info = probe_hdf5(hdf5_path)
+        except Exception:
+            # unreadable files fail in the worker, where the error is reported
+            return 0
+        nbytes = 0
+        for key, shape in info['cameras'].items():
+            transform = get_image_transform(self.config.image_transforms, f'observation.images.{key}')
+            nbytes += int(np.prod(shape if transform is None else transform.output_shape(shape)))
+        return info['length'] * nbytes
+
+    def _yield_episodes_parallel(self, hdf5_paths):
+        """
+        Parse episodes in a process pool and yield them in source order.
+        At most `prefetch_episodes` episodes are parsed or waiting at any time, and fewer when their
+        estimated decoded size would exceed the memory budget, so the writer always has the next
+        episode ready without unbounded memory growth.
+        """
+        prefetch = max(1, self.config.prefetch_episodes)
+        pending = deque()
+        next_index = 0
+
+        def submit(executor, handover=0):
+            nonlocal next_index
+            while next_index < len(hdf5_paths) and len(pending) < prefetch:
+                track = self.budget.limit > 0 or self.timer.enabled
+                nbytes = self._estimate_episode_nbytes(hdf5_paths[next_index]) if track else 0
+                # `handover` is the episode about to be charged by the writer
+                if (pending or handover) and not self.budget.fits(nbytes, extra=handover):
+                    break
+                self.budget.charge(nbytes, extra=handover)
+                future = executor.submit(load_hdf5, hdf5_paths[next_index], self.config)
+                pending.append((future, hdf5_paths[next_index], nbytes))
+                next_index += 1
+
+        with ProcessPoolExecutor(max_workers=self.config.num_read_workers) as executor:
+            submit(executor)
+            while pending:
+                future, hdf5_path, nbytes = pending.popleft()
+                try:
+                    episode = future.result()
+                except Exception as e:
+                    # the worker's traceback is chained to the error
+                    self.budget.release(nbytes)
+                    self._quarantine(hdf5_path, e)
+                    submit(executor)
+                    continue
+                self.budget.release(nbytes)
+                # refill before handing the episode over, so parsing continues while it is written
+                submit(executor, handover=episode.nbytes)
+                yield episode
+                # the episode is written, start what did not fit next to it
+                submit(executor)
@@ -0,0 +1,23 @@
+import numpy as np
+from typing import Tuple
+
+
+def find_moving_frames(values: np.ndarray, fps: float, threshold: float) -> np.ndarray:
+    # (N - 1,) mask of the steps where any dimension moves faster than threshold (units per second)
+    velocity = np.abs(np.diff(values.reshape(len(values), -1), axis=0)) * fps
+    return (velocity > threshold).any(axis=1)
+
+
+def find_active_range(state: np.ndarray, action: np.ndarray, fps: float, threshold: float, margin: int = 0) -> Tuple[int, int]:
+    """
+    Frames [start, stop) between the leading and trailing spans where neither the state nor the action moves,
+    widened by `margin` frames on both sides. Returns an empty range when nothing moves.
+    """
+    moving = find_moving_frames(state, fps, threshold) | find_moving_frames(action, fps, threshold)
+    steps = np.flatnonzero(moving)
+    if len(steps) == 0:
+        return 0, 0
+    # step i moves from frame i to frame i + 1, both are kept
+    start = max(0, steps[0] - margin)
+    stop = min(len(state), steps[-1] + 2 + margin)
+    return int(start), int(stop)
@@ -0,0 +1,62 @@
+import io
+import math
+import numpy as np
+from PIL import Image
+from typing import Optional, Sequence
+
+
+class ImageTransform:
+    """
+    Crop (top, left, height, width) in source pixels, then resize to size (height, width).
+    JPEG buffers are decoded at a reduced scale (`Image.draft`) when the target is small enough,
+    so the IDCT only produces about the pixels that are kept.
+    """
+    def __init__(self, size: Optional[Sequence[int]] = None, crop: Optional[Sequence[int]] = None):
+        self.size = None if size is None else tuple(int(x) for x in size)
+        self.crop = None if crop is None else tuple(int(x) for x in crop)
+
+    def _get_box(self, width, height):
+        if self.crop is None:
+            return (0, 0, width, height)
+        top, left, crop_height, crop_width = self.crop
+        if top < 0 or left < 0 or top + crop_height > height or left + crop_width > width:
+            raise ValueError(f'Crop {self.crop} is out of bounds for an image of {height}x{width}.')
+        return (left, top, left + crop_width, top + crop_height)
+
+    def output_shape(self, shape):
+        # (H, W, C) of a transformed (H, W, C) frame
+        if self.size is not None:
+            return (*self.size, *shape[2:])
+        if self.crop is not None:
+            return (*self.crop[2:], *shape[2:])
+        return tuple(shape)
+
+    def _apply(self, img, box):
+        if self.size is not None:
+            return img.resize((self.size[1], self.size[0]), Image.BILINEAR, box=box)
+        if self.crop is not None:
+            return img.crop(tuple(round(x) for x in box))
+        return img
+
+    def decode(self, image_buffer) -> np.ndarray:
+        with Image.open(io.BytesIO(image_buffer)) as img:
+            width, height = img.size
+            left, top, right, bottom = self._get_box(width, height)
+            if self.size is not None:
+                # draft picks the smallest 1/2^k scale keeping at least the requested size, no-op for non-JPEG
+                scale = max(self.size[1] / (right - left), self.size[0] / (bottom - top))
+                img.draft(img.mode, (math.ceil(width * scale), math.ceil(height * scale)))
+            scale_x, scale_y = img.width / width, img.height / height
+            box = (left * scale_x, top * scale_y, right * scale_x, bottom * scale_y)
+            return np.asarray(self._apply(img, box))
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        # (H, W, C) uint8 frame that is already decoded
+        img = Image.fromarray(image)
+        return np.asarray(self._apply(img, self._get_box(img.width, img.height)))
+
+
+def get_image_transform(image_transforms: Optional[dict], key: str) -> Optional[ImageTransform]:
+    if not image_transforms or key not in image_transforms:
+        return None
+    return ImageTransform(**image_transforms[key])
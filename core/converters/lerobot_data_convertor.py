@@ -5,19 +5,15 @@ from lerobot.datasets.lerobot_dataset import LeRobotDataset
 
 from .base_data_convertor import BaseDataConvertor
 from .configuration_data_convertor import LeRobotDataConvertorConfig
+from .episode_batch import EpisodeBatch
+from .image_transform import get_image_transform
+from .state_layout import compile_layout
 
 
 def _get_default_lerobot_root():
     return os.path.join(os.path.expanduser('~'), '.cache', 'huggingface', 'lerobot')
 
 
-def _extract_joint(state):
-    return np.concatenate([
-        state[..., 0:8],   # left joint + gripper
-        state[..., 17:25], # right joint + gripper
-    ])
-
-
 def _generate_task(frame, annotation):
     task = 'task: {}\n'.format(frame['task'])
     task += 'description: {}\n'.format(annotation['scene_description'])
@@ -33,7 +29,7 @@ def _generate_task(frame, annotation):
     return task.strip().replace('the ', '').replace('.', '').replace('a ', '').replace('is ', '').replace('are ', '')
 
 
-def _parse_episode(repo_id, episode):
+def _parse_episode(repo_id, episode, state_layout=None, image_transforms=None):
     episode_index = episode[0]['episode_index']
     annotation_path = os.path.join(_get_default_lerobot_root(), repo_id, 'annotations', f'episode_{episode_index:06d}.json')
 
@@ -41,33 +37,42 @@ def _parse_episode(repo_id, episode):
         annotations = json.load(f)
 
     assert len(annotations) == len(episode)
-    new_episodes = []
-    new_episode = []
-    prev_task = None
-
-    for frame, annotation in zip(episode, annotations):
-        task = _generate_task(frame, annotation)
-        new_frame = {
-            'observation.images.cam_high': frame['observation.images.cam_high'].numpy(),
-            'observation.images.cam_left_wrist': frame['observation.images.cam_left_wrist'].numpy(),
-            'observation.images.cam_right_wrist': frame['observation.images.cam_right_wrist'].numpy(),
-            'observation.state': _extract_joint(frame['observation.state'].numpy()),
-            'action': _extract_joint(frame['action'].numpy()),
-            'task': task,
-        }
-        if prev_task is None:
-            prev_task = task
-        elif prev_task != task:
-            new_episodes.append(new_episode)
-            new_episode = []
-            prev_task = task
-        
-        new_episode.append(new_frame)
-
-    if len(new_episode) > 0:
-        new_episodes.append(new_episode)
-    
-    return new_episodes
+    tasks = [_generate_task(frame, annotation) for frame, annotation in zip(episode, annotations)]
+
+    layout = compile_layout(state_layout)
+
+    def stack(key):
+        return np.stack([frame[key].numpy() for frame in episode])
+
+    def stack_state(key):
+        return stack(key) if layout is None else layout(stack(key))
+
+    def stack_image(key):
+        transform = get_image_transform(image_transforms, key)
+        if transform is None:
+            return stack(key)
+        # frames are (C, H, W) floats in [0, 1], transformed frames are (H, W, C) uint8
+        return np.stack([
+            transform((frame[key].numpy().transpose(1, 2, 0) * 255).round().astype(np.uint8)) for frame in episode
+        ])
+
+    batch = EpisodeBatch({
+        'observation.images.cam_high': stack_image('observation.images.cam_high'),
+        'observation.images.cam_left_wrist': stack_image('observation.images.cam_left_wrist'),
+        'observation.images.cam_right_wrist': stack_image('observation.images.cam_right_wrist'),
+        'observation.state': stack_state('observation.state'),
+        'action': stack_state('action'),
+    }, tasks=tasks)
+
+    # split into a new episode wherever the generated task changes
+    bounds = [0] + [i for i in range(1, len(tasks)) if tasks[i] != tasks[i - 1]] + [len(tasks)]
+    episodes = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        new_episode = batch.slice(start, stop)
+        # every piece is saved as its own episode, resume skips the pieces saved before an interruption
+        new_episode.source = f'{repo_id}:{int(episode_index)}:{start}'
+        episodes.append(new_episode)
+    return episodes
 
 
 class LeRobotDataConvertor(BaseDataConvertor):
@@ -86,7 +91,7 @@ class LeRobotDataConvertor(BaseDataConvertor):
                 prev_episode_index = episode_index
 
             if episode_index != prev_episode_index:
-                new_episodes = _parse_episode(self.config.source_repo_id, episode)
+                new_episodes = _parse_episode(self.config.source_repo_id, episode, self.config.state_layout, self.config.image_transforms)
                 for new_episode in new_episodes:
                     yield new_episode
                 episode = []
@@ -95,6 +100,6 @@ class LeRobotDataConvertor(BaseDataConvertor):
             episode.append(sample)
         
         if len(episode) > 0:
-            new_episodes = _parse_episode(self.config.source_repo_id, episode)
+            new_episodes = _parse_episode(self.config.source_repo_id, episode, self.config.state_layout, self.config.image_transforms)
             for new_episode in new_episodes:
                 yield new_episode
\ No newline at end of file
@@ -0,0 +1,43 @@
+import threading
+import time
+from typing import Callable
+
+
+class MemoryBudget:
+    """
+    Bytes of decoded frames in flight between reading and writing, bounded by `limit` (0 only tracks the peak).
+    Charging never blocks, producers check `fits` before starting more work instead.
+    Nothing in flight always fits, so an episode larger than the budget still makes progress.
+    """
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def fits(self, nbytes: int, extra: int = 0) -> bool:
+        # `extra` is memory about to be charged, e.g. an episode that is being handed over
+        with self._lock:
+            used = self.in_flight + extra
+            return self.limit <= 0 or used == 0 or used + nbytes <= self.limit
+
+    def charge(self, nbytes: int, extra: int = 0):
+        with self._lock:
+            self.in_flight += nbytes
+            self.peak = max(self.peak, self.in_flight + extra)
+
+    def release(self, nbytes: int):
+        with self._lock:
+            self.in_flight -= nbytes
+
+    def wait_for(self, get_backlog: Callable[[], int], poll_interval: float = 0.005):
+        """
+        Block while the charged bytes plus a backlog drained by another worker (e.g. the queue of the
+        image writer processes) exceed the limit.
+        """
+        while True:
+            backlog = get_backlog()
+            self.charge(0, extra=backlog)
+            if self.fits(0, extra=backlog) or backlog == 0:
+                return
+            time.sleep(poll_interval)
@@ -0,0 +1,46 @@
+import datasets
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+
+def supports_direct_parquet(hf_features: datasets.Features) -> bool:
+    # scalars and fixed-length vectors, images are embedded by `datasets` and keep the generic path
+    for feature in hf_features.values():
+        if isinstance(feature, datasets.Sequence):
+            feature = feature.feature
+        if not isinstance(feature, datasets.Value):
+            return False
+    return True
+
+
+def to_arrow_array(values: np.ndarray, arrow_type: pa.DataType) -> pa.Array:
+    """
+    Column of type `arrow_type` from an (N, ...) array. FixedSizeList columns wrap the flat values,
+    so no Python object is created per row.
+    """
+    if pa.types.is_fixed_size_list(arrow_type) or pa.types.is_list(arrow_type):
+        size = values.shape[1] if values.ndim > 1 else 1
+        child = to_arrow_array(values.reshape((len(values) * size,) + values.shape[2:]), arrow_type.value_type)
+        if pa.types.is_fixed_size_list(arrow_type):
+            return pa.FixedSizeListArray.from_arrays(child, arrow_type.list_size)
+        return pa.ListArray.from_arrays(pa.array(np.arange(0, len(child) + 1, size, dtype=np.int32)), child)
+    values = np.ascontiguousarray(values.reshape(len(values)), dtype=arrow_type.to_pandas_dtype())
+    return pa.array(values, type=arrow_type)
+
+
+def write_episode_parquet(episode_buffer: dict, hf_features: datasets.Features, path: Path):
+    """
+    Write the columns of a saved episode buffer like `Dataset.from_dict(...).to_parquet(path)` does:
+    same schema and huggingface metadata, row groups of `datasets.config.DEFAULT_MAX_BATCH_SIZE` rows.
+    """
+    schema = hf_features.arrow_schema
+    columns = [to_arrow_array(np.asarray(episode_buffer[field.name]), field.type) for field in schema]
+    table = pa.Table.from_arrays(columns, schema=schema)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    batch_size = datasets.config.DEFAULT_MAX_BATCH_SIZE
+    with pq.ParquetWriter(path, schema=schema) as writer:
+        for offset in range(0, len(table), batch_size):
+            writer.write_table(table.slice(offset, batch_size))
@@ -0,0 +1,20 @@
+from typing import List, Optional
+
+
+def get_shard(items: List, num_shards: int, shard_index: int) -> List:
+    """
+    Contiguous block `shard_index` out of `num_shards` blocks of near-equal size.
+    Blocks keep the order of `items`, so concatenating shards 0..num_shards-1 restores it.
+    """
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(f'shard_index must be in [0, {num_shards}), got {shard_index}.')
+    start = len(items) * shard_index // num_shards
+    stop = len(items) * (shard_index + 1) // num_shards
+    return items[start:stop]
+
+
+def get_shard_name(name: Optional[str], num_shards: int, shard_index: int) -> Optional[str]:
+    # repo id or data root of the partial dataset written by one shard
+    if name is None or num_shards <= 1:
+        return name
+    return f'{name.rstrip("/")}_shard-{shard_index:03d}-of-{num_shards:03d}'
@@ -0,0 +1,108 @@
+import json
+import os
+from typing import Callable, Dict, List, Tuple
+
+
+class SourceManifest:
+    """
+    Persistent index of the source files under `root`, stored as JSON at `path`.
+
+    Each entry records size, mtime and whatever `probe` returns (episode length, camera shapes, task, ...).
+    Refreshing only lists directories whose mtime changed: an unchanged directory reuses its cached listing,
+    and its files are assumed unchanged since recordings are written once. Files in changed directories are
+    probed again only when their size or mtime differ from the cached entry.
+    """
+    VERSION = 1
+
+    def __init__(self, root: str, path: str, probe: Callable[[str], dict], suffixes: Tuple[str, ...]):
+        self.root = root
+        self.path = path
+        self.probe = probe
+        self.suffixes = suffixes
+        self.directories: Dict[str, dict] = {}
+        self.entries: Dict[str, dict] = {}
+        self.num_probed = 0
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != self.VERSION or manifest.get('root') != os.path.abspath(self.root):
+            return
+        self.directories = manifest['directories']
+        self.entries = manifest['entries']
+
+    def save(self):
+        manifest = {
+            'version': self.VERSION,
+            'root': os.path.abspath(self.root),
+            'directories': self.directories,
+            'entries': self.entries,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # write then rename, so an interrupted run never leaves a truncated manifest
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        directories, entries = {}, {}
+        self.num_probed = 0
+        self._scan('', directories, entries)
+        self.directories, self.entries = directories, entries
+
+    def _scan(self, rel_dir, directories, entries):
+        abs_dir = os.path.join(self.root, rel_dir)
+        try:
+            mtime = os.stat(abs_dir).st_mtime_ns
+        except FileNotFoundError:
+            return
+
+        listing = self.directories.get(rel_dir)
+        if listing is not None and listing['mtime'] == mtime:
+            for rel_path in listing['files']:
+                if rel_path in self.entries:
+                    entries[rel_path] = self.entries[rel_path]
+                else:
+                    entries[rel_path] = self._probe_file(rel_path, os.stat(os.path.join(self.root, rel_path)))
+        else:
+            subdirs, files = [], []
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    rel_path = os.path.join(rel_dir, entry.name)
+                    if entry.is_dir():
+                        subdirs.append(rel_path)
+                    elif entry.name.endswith(self.suffixes):
+                        files.append(rel_path)
+                        entries[rel_path] = self._probe_file(rel_path, entry.stat())
+            listing = {'mtime': mtime, 'subdirs': sorted(subdirs), 'files': sorted(files)}
+
+        directories[rel_dir] = listing
+        for subdir in listing['subdirs']:
+            self._scan(subdir, directories, entries)
+
+    def _probe_file(self, rel_path, stat):
+        cached = self.entries.get(rel_path)
+        if cached is not None and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns:
+            return cached
+
+        entry = {'path': rel_path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        try:
+            entry.update(self.probe(os.path.join(self.root, rel_path)))
+        except Exception as e:
+            # keep unreadable files in the manifest, the converter reports them when it reaches them
+            entry['error'] = repr(e)
+        self.num_probed += 1
+        return entry
+
+    def paths(self) -> List[str]:
+        return sorted(os.path.join(self.root, rel_path) for rel_path in self.entries)
+
+    def get(self, path: str) -> dict:
+        return self.entries.get(os.path.relpath(path, self.root))
+
+    def total_frames(self) -> int:
+        return sum(entry.get('length', 0) for entry in self.entries.values())
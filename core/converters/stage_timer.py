@@ -0,0 +1,105 @@
+import contextlib
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Optional
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class StageTimer:
+    """
+    Accumulates wall time per conversion stage, plus frame and byte counters.
+    When disabled, `stage` returns a shared no-op context and counters are ignored.
+    """
+    def __init__(self, enabled: bool = False, per_episode: bool = False):
+        self.enabled = enabled
+        self.per_episode = per_episode
+        self.totals = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.episodes = []
+        self._episode = None
+        # stages timed between episodes (e.g. reading the next one) are attributed to the next episode
+        self._pending = defaultdict(float)
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def _timed(self, name, background):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.totals[name] += elapsed
+            # background stages overlap the others, they are not attributed to the episode converted meanwhile
+            if not background:
+                if self._episode is not None:
+                    self._episode['stages'][name] = self._episode['stages'].get(name, 0.0) + elapsed
+                elif self.per_episode:
+                    self._pending[name] += elapsed
+
+    def stage(self, name: str, background: bool = False):
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed(name, background)
+
+    def count(self, name: str, value: int):
+        if not self.enabled:
+            return
+        self.counters[name] += value
+        if self._episode is not None:
+            self._episode[name] = self._episode.get(name, 0) + value
+
+    def start_episode(self, source: Optional[str] = None):
+        if self.enabled and self.per_episode:
+            self._episode = {'source': source, 'stages': dict(self._pending)}
+            self._pending.clear()
+
+    def end_episode(self):
+        if self._episode is not None:
+            self.episodes.append(self._episode)
+            self._episode = None
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self._start
+        frames = self.counters.get('frames', 0)
+        summary = {
+            'elapsed': elapsed,
+            'frames': frames,
+            'frames_per_second': frames / elapsed if elapsed > 0 else 0.0,
+            'counters': dict(self.counters),
+            'stages': {
+                name: {'seconds': seconds, 'share': seconds / elapsed if elapsed > 0 else 0.0}
+                for name, seconds in self.totals.items()
+            },
+        }
+        if self.per_episode:
+            summary['episodes'] = self.episodes
+        return summary
+
+    def report(self, path: Optional[str] = None):
+        if not self.enabled:
+            return
+        summary = self.summary()
+
+        print(f'Converted {summary["frames"]} frames in {summary["elapsed"]:.1f}s '
+              f'({summary["frames_per_second"]:.1f} frames/s)')
+        for name, value in summary['counters'].items():
+            if name.startswith('bytes'):
+                print(f'  {name}: {value / 2 ** 20:.1f} MiB')
+        for name, stage in sorted(summary['stages'].items(), key=lambda item: -item[1]['seconds']):
+            print(f'  {name:<16s} {stage["seconds"]:9.2f}s {100 * stage["share"]:5.1f}%')
+
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(summary, f, indent=4)
+
+
+def get_dir_size(path) -> int:
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
@@ -0,0 +1,40 @@
+import functools
+import json
+import numpy as np
+from typing import List, Optional
+
+
+class StateLayout:
+    """
+    Compiled state layout: named segments of a source vector gathered into one output vector.
+    The spec is a list of {'name': str, 'range': (start, stop)} in output order.
+    """
+    def __init__(self, spec: List[dict]):
+        self.spec = [{'name': segment['name'], 'range': list(segment['range'])} for segment in spec]
+        self.indices = np.concatenate([np.arange(*segment['range']) for segment in self.spec])
+
+        self.names = []
+        for segment in self.spec:
+            start, stop = segment['range']
+            if stop - start == 1:
+                self.names.append(segment['name'])
+            else:
+                self.names.extend(f'{segment["name"]}_{i}' for i in range(stop - start))
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __call__(self, state):
+        return np.take(state, self.indices, axis=-1)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_layout(spec_json: str) -> StateLayout:
+    return StateLayout(json.loads(spec_json))
+
+
+def compile_layout(spec: Optional[List[dict]]) -> Optional[StateLayout]:
+    # compiled layouts are cached, so callers may compile per episode without repeating the work
+    if spec is None:
+        return None
+    return _compile_layout(json.dumps(spec))
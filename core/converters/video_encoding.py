@@ -0,0 +1,198 @@
+import av
+import glob
+import logging
+import numpy as np
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from PIL import Image
+from typing import Any, Dict, Optional, Sequence
+
+from lerobot.datasets.compute_stats import auto_downsample_height_width, get_feature_stats, sample_indices
+from lerobot.datasets.image_writer import image_array_to_pil_image
+
+
+@dataclass
+class VideoProfile:
+    """
+    Encoder settings of the episode videos. The GOP length `g` bounds how many frames a decoder
+    has to decode after seeking to a keyframe, so it drives the random-access cost of training dataloaders.
+    """
+    vcodec: str = 'libsvtav1'
+    pix_fmt: str = 'yuv420p'
+    # keyframe interval in frames, None for the encoder default
+    g: Optional[int] = 2
+    # constant rate factor, lower is better quality and larger files
+    crf: Optional[int] = 30
+    # encoder speed preset, e.g. 'ultrafast' ... 'veryslow' for libx264 or '0' ... '13' for libsvtav1
+    preset: Optional[str] = None
+    # encoder threads, 0 lets the encoder decide
+    threads: int = 0
+    # tune the stream for decoding speed
+    fast_decode: int = 0
+
+    def get_options(self) -> Dict[str, str]:
+        options = {}
+        if self.g is not None:
+            options['g'] = str(self.g)
+        if self.crf is not None:
+            options['crf'] = str(self.crf)
+        if self.preset is not None:
+            options['preset'] = str(self.preset)
+        if self.threads > 0:
+            options['threads'] = str(self.threads)
+        if self.fast_decode:
+            if self.vcodec == 'libsvtav1':
+                options['svtav1-params'] = f'fast-decode={self.fast_decode}'
+            else:
+                options['tune'] = 'fastdecode'
+        return options
+
+    def add_stream(self, container, fps: int, width: int, height: int):
+        stream = container.add_stream(self.vcodec, fps, options=self.get_options())
+        stream.pix_fmt = self.pix_fmt
+        stream.width = width
+        stream.height = height
+        return stream
+
+
+# 'default' matches the settings of lerobot's `encode_video_frames`
+VIDEO_PROFILES = {
+    'default': VideoProfile(),
+    # fastest conversion, larger files
+    'fast-ingest': VideoProfile(vcodec='libx264', g=30, crf=23, preset='ultrafast'),
+    # smallest files, slow encoding and long seeks
+    'archive': VideoProfile(vcodec='libsvtav1', g=240, crf=30, preset='4'),
+    # a keyframe every other frame and a stream tuned for decoding speed, for shuffled training access
+    'random-access': VideoProfile(vcodec='libx264', g=2, crf=23, preset='veryfast', fast_decode=1),
+}
+
+
+def get_video_profile(name: Optional[str], options: Optional[Dict[str, Any]] = None) -> Optional[VideoProfile]:
+    # named profile with some fields overridden, None keeps lerobot's encoder
+    if name is None:
+        if options:
+            raise ValueError('video_options require a video_profile.')
+        return None
+    if name not in VIDEO_PROFILES:
+        raise ValueError(f'Unknown video profile {name}, available: {list(VIDEO_PROFILES)}.')
+    profile = replace(VIDEO_PROFILES[name], **(options or {}))
+    # fail before converting anything if PyAV was built without the encoder
+    av.codec.Codec(profile.vcodec, 'w')
+    return profile
+
+
+def get_video_profile_info(name: str, profile: VideoProfile) -> dict:
+    return {'name': name, **asdict(profile)}
+
+
+def encode_video_frames(imgs_dir: Path, video_path: Path, fps: int, profile: VideoProfile):
+    """
+    Encode the frame_XXXXXX.png images of `imgs_dir` like lerobot's `encode_video_frames`, with the settings of `profile`.
+    """
+    imgs_dir, video_path = Path(imgs_dir), Path(video_path)
+    input_list = sorted(glob.glob(str(imgs_dir / ('frame_' + '[0-9]' * 6 + '.png'))))
+    if len(input_list) == 0:
+        raise FileNotFoundError(f'No images found in {imgs_dir}.')
+    width, height = Image.open(input_list[0]).size
+
+    video_path.parent.mkdir(parents=True, exist_ok=True)
+    logging.getLogger('libav').setLevel(logging.ERROR)
+    with av.open(str(video_path), 'w') as output:
+        stream = profile.add_stream(output, fps, width, height)
+        for path in input_list:
+            frame = av.VideoFrame.from_image(Image.open(path).convert('RGB'))
+            output.mux(stream.encode(frame))
+        # flush the encoder
+        output.mux(stream.encode())
+    av.logging.restore_default_callback()
+
+    if not video_path.exists():
+        raise OSError(f'Video encoding did not work. File not found: {video_path}.')
+
+
+def to_rgb24(frame: np.ndarray) -> np.ndarray:
+    # (H, W, 3) uint8 frame, converted like lerobot's image writer does before writing the PNG images:
+    # (C, H, W) frames are transposed and float frames in [0, 1] are scaled to uint8
+    if frame.dtype == np.uint8 and frame.ndim == 3 and frame.shape[-1] == 3:
+        return frame
+    return np.asarray(image_array_to_pil_image(frame))
+
+
+class EpisodeVideoWriter:
+    """
+    Encodes the camera frames of an episode as they are added, with one PyAV encoder per camera writing straight
+    to the episode's video file, so no intermediate image is written. The frames lerobot samples for the episode
+    stats are kept in memory, PNG is lossless so the stats are the same as when computed from the images.
+    """
+    def __init__(self, profile: VideoProfile, fps: int):
+        self.profile = profile
+        self.fps = fps
+        self._paths = {}
+        self._outputs = {}
+        self._num_frames = {}
+        self._samples = {}
+        self._sample_positions = {}
+        self._expected_frames = 0
+
+    def open(self, video_paths: Dict[str, Path], num_frames: int):
+        # the encoders are opened with the first frame of each camera, once its size is known
+        self._paths = {key: Path(path) for key, path in video_paths.items()}
+        self._expected_frames = num_frames
+        self._sample_positions = {index: i for i, index in enumerate(sample_indices(num_frames))}
+
+    def _open_output(self, key: str, height: int, width: int):
+        path = self._paths[key]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        logging.getLogger('libav').setLevel(logging.ERROR)
+        container = av.open(str(path), 'w')
+        return container, self.profile.add_stream(container, self.fps, width, height)
+
+    def add_frames(self, key: str, frames: Sequence[np.ndarray]):
+        # frames in order, as an array or a list, in any layout lerobot's image writer accepts
+        start = self._num_frames.get(key, 0)
+        for i, frame in enumerate(frames):
+            frame = to_rgb24(frame)
+            if key not in self._outputs:
+                self._outputs[key] = self._open_output(key, *frame.shape[:2])
+            container, stream = self._outputs[key]
+            container.mux(stream.encode(av.VideoFrame.from_ndarray(np.ascontiguousarray(frame), format='rgb24')))
+            position = self._sample_positions.get(start + i)
+            if position is not None:
+                # same (C, H, W) downsampled copy that lerobot's `sample_images` loads from the image files
+                sample = auto_downsample_height_width(frame.transpose(2, 0, 1))
+                if key not in self._samples:
+                    self._samples[key] = np.empty((len(self._sample_positions),) + sample.shape, dtype=np.uint8)
+                self._samples[key][position] = sample
+        self._num_frames[key] = start + len(frames)
+
+    def close(self) -> Dict[str, dict]:
+        """
+        Flush the encoders and return the stats of every camera, in the format of `compute_episode_stats`.
+        """
+        try:
+            for key in self._paths:
+                if self._num_frames.get(key, 0) != self._expected_frames:
+                    raise ValueError(f'{key} got {self._num_frames.get(key, 0)} frames, expected {self._expected_frames}.')
+            for container, stream in self._outputs.values():
+                container.mux(stream.encode())
+            stats = {}
+            for key, samples in self._samples.items():
+                stats[key] = get_feature_stats(samples, axis=(0, 2, 3), keepdims=True)
+                stats[key] = {k: v if k == 'count' else np.squeeze(v / 255.0, axis=0) for k, v in stats[key].items()}
+            return stats
+        finally:
+            self._reset()
+
+    def abort(self):
+        # drop the partial videos of a failed episode
+        paths = list(self._paths.values())
+        self._reset()
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def _reset(self):
+        for container, _ in self._outputs.values():
+            container.close()
+        if self._outputs:
+            av.logging.restore_default_callback()
+        self._paths, self._outputs, self._num_frames, self._samples = {}, {}, {}, {}
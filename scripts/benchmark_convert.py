@@ -0,0 +1,119 @@
+"""
+Benchmark HDF5 -> LeRobot conversion on synthetic episodes.
+
+Examples:
+
+```bash
+python scripts/benchmark_convert.py --num_episodes 10 --num_frames 300 --num_cameras 3
+
+python scripts/benchmark_convert.py --num_read_workers 4 --image_decode_threads 4 --profile_stages
+```
+
+Run one configuration per invocation, peak RSS is measured for the whole process.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+import sys
+sys.path.append('.')
+
+from core.benchmarks.convert_benchmark import run_convert_benchmark
+from core.benchmarks.synthetic_hdf5 import generate_synthetic_dataset
+from core.converters.configuration_data_convertor import HDF5DataConvertorConfig
+from core.converters.video_encoding import VIDEO_PROFILES
+
+
+def main(args):
+    source_root = os.path.join(args.work_dir, 'source')
+    cameras = ['cam_high', 'cam_left_wrist', 'cam_right_wrist'][:args.num_cameras]
+    cameras += [f'cam_extra_{i}' for i in range(args.num_cameras - len(cameras))]
+    generate_synthetic_dataset(
+        source_root,
+        args.num_episodes,
+        num_frames=args.num_frames,
+        cameras=cameras,
+        height=args.height,
+        width=args.width,
+        state_dim=args.state_dim,
+        chunked=args.chunked,
+        compression=args.compression,
+        raw=args.raw_images,
+    )
+
+    config = HDF5DataConvertorConfig(
+        root=source_root,
+        repo_id='benchmark/synthetic',
+        data_root=os.path.join(args.work_dir, 'output'),
+        overwrite=False,
+        video_backend=args.video_backend,
+        video_profile=args.video_profile,
+        video_options=json.loads(args.video_options) if args.video_options is not None else None,
+        stream_video=args.stream_video,
+        image_writer_processes=args.image_writer_processes,
+        image_writer_threads=args.image_writer_threads,
+        memory_budget=args.memory_budget,
+        frame_pool=args.frame_pool,
+        dtypes=json.loads(args.dtypes) if args.dtypes is not None else None,
+        dtype_tolerance=args.dtype_tolerance,
+        async_save=args.async_save,
+        max_pending_saves=args.max_pending_saves,
+        direct_parquet=args.direct_parquet,
+        num_read_workers=args.num_read_workers,
+        prefetch_episodes=args.prefetch_episodes,
+        image_decode_threads=args.image_decode_threads,
+        stream_chunk_size=args.stream_chunk_size,
+        chunk_cache_size=args.chunk_cache_size,
+        direct_chunk_read=args.direct_chunk_read,
+        profile_stages=args.profile_stages,
+    )
+    result = run_convert_benchmark(config)
+    result['config'] = vars(args)
+
+    print(f'{result["episodes"]} episodes, {result["frames"]} frames in {result["seconds"]:.1f}s '
+          f'({result["frames_per_second"]:.1f} frames/s)')
+    print(f'peak RSS: {result["peak_rss"] / 2 ** 20:.0f} MiB (largest child process: {result["peak_rss_children"] / 2 ** 20:.0f} MiB)')
+    print(f'input: {result["input_size"] / 2 ** 20:.1f} MiB, output: {result["output_size"] / 2 ** 20:.1f} MiB')
+
+    if args.report_path is not None:
+        with open(args.report_path, 'w') as f:
+            json.dump(result, f, indent=4)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--work_dir', type=str, default=os.path.join(tempfile.gettempdir(), 'rdp_benchmark'), help='Directory for the synthetic source and the converted output.')
+    parser.add_argument('--num_episodes', type=int, default=10, help='Number of synthetic episodes.')
+    parser.add_argument('--num_frames', type=int, default=300, help='Number of frames per episode.')
+    parser.add_argument('--num_cameras', type=int, default=3, help='Number of cameras per episode.')
+    parser.add_argument('--height', type=int, default=480, help='Frame height.')
+    parser.add_argument('--width', type=int, default=640, help='Frame width.')
+    parser.add_argument('--state_dim', type=int, default=128, help='Dimension of qpos and action.')
+    parser.add_argument('--chunked', action='store_true', help='Store every image record in its own chunk.')
+    parser.add_argument('--compression', type=str, default=None, help='Filter of the chunked image datasets (e.g. gzip).')
+    parser.add_argument('--raw_images', action='store_true', help='Store the cameras as raw uint8 frames instead of JPEG records.')
+    parser.add_argument('--video_backend', type=str, default='pyav', help='Video backend for lerobot (pyav, torchcodec or none).')
+    parser.add_argument('--video_profile', type=str, default=None, choices=list(VIDEO_PROFILES), help='Video encoding profile, recorded in info.json (lerobot defaults if not set).')
+    parser.add_argument('--video_options', type=str, default=None, help='JSON dict of profile fields to override, e.g. \'{"crf": 25, "threads": 4}\'.')
+    parser.add_argument('--stream_video', action='store_true', help='Encode frames into the videos as they are added instead of writing PNG images first.')
+    parser.add_argument('--image_writer_processes', type=int, default=1, help='Number of processes for image writing.')
+    parser.add_argument('--image_writer_threads', type=int, default=1, help='Number of threads for image writing.')
+    parser.add_argument('--async_save', action='store_true', help='Save episodes (stats, parquet, video encoding) on a background thread while the next one is converted.')
+    parser.add_argument('--max_pending_saves', type=int, default=1, help='Maximum number of episodes being saved in the background with --async_save.')
+    parser.add_argument('--direct_parquet', action='store_true', help='Write episode parquet files directly with pyarrow instead of through datasets.')
+    parser.add_argument('--dtypes', type=str, default=None, help='JSON dict of output dtypes of low-dim features, e.g. \'{"observation.state": "float32", "action": "float32"}\'.')
+    parser.add_argument('--dtype_tolerance', type=float, default=1e-3, help='Warn when casting to --dtypes loses more than this absolute error.')
+    parser.add_argument('--memory_budget', type=int, default=0, help='Bytes of decoded frames in flight between reading and writing (0 for no limit).')
+    parser.add_argument('--frame_pool', action='store_true', help='Decode episodes into frame arenas reused across episodes (not used with read workers or streaming).')
+    parser.add_argument('--num_read_workers', type=int, default=0, help='Number of processes for parsing HDF5 files.')
+    parser.add_argument('--prefetch_episodes', type=int, default=2, help='Maximum number of parsed episodes kept in flight by the read workers.')
+    parser.add_argument('--image_decode_threads', type=int, default=0, help='Number of threads for batch JPEG decoding per camera.')
+    parser.add_argument('--stream_chunk_size', type=int, default=0, help='If > 0, stream episodes in chunks of this many frames.')
+    parser.add_argument('--chunk_cache_size', type=int, default=0, help='Raw chunk cache size in bytes per open HDF5 file.')
+    parser.add_argument('--direct_chunk_read', action='store_true', help='Read image records directly from the stored chunks.')
+    parser.add_argument('--profile_stages', action='store_true', help='Print the per-stage timing summary of the conversion.')
+    parser.add_argument('--report_path', type=str, default=None, help='Path of the JSON benchmark report.')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,42 @@
+import argparse
+import time
+
+import numpy as np
+
+import sys
+sys.path.append('.')
+
+from core.benchmarks.synthetic_hdf5 import make_jpeg_buffers
+from core.converters.hdf5_data_convertor import decode_image, decode_images
+
+
+def benchmark(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args):
+    buffers = make_jpeg_buffers(args.num_frames, args.height, args.width)
+    print(f'{args.num_frames} frames of {args.height}x{args.width}, best of {args.repeats} runs')
+
+    elapsed = benchmark(lambda: np.array([decode_image(buffer) for buffer in buffers]), args.repeats)
+    print(f'per-frame decode:          {args.num_frames / elapsed:8.1f} frames/s')
+
+    for num_threads in args.num_threads:
+        elapsed = benchmark(lambda: decode_images(buffers, num_threads), args.repeats)
+        print(f'batch decode ({num_threads:2d} threads): {args.num_frames / elapsed:8.1f} frames/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--num_frames', type=int, default=300, help='Number of frames per camera.')
+    parser.add_argument('--height', type=int, default=480, help='Frame height.')
+    parser.add_argument('--width', type=int, default=640, help='Frame width.')
+    parser.add_argument('--num_threads', type=int, nargs='+', default=[1, 2, 4, 8], help='Thread counts to benchmark.')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of runs per configuration, the best is reported.')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,86 @@
+"""
+Benchmark reading the compressed image records and the state of synthetic episodes,
+for contiguous, chunked and gzip-chunked files, with the default h5py chunk cache,
+a larger chunk cache and direct chunk reads.
+
+```bash
+python scripts/benchmark_hdf5_read.py --num_frames 300 --chunk_cache_size 67108864
+```
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import sys
+sys.path.append('.')
+
+from core.benchmarks.synthetic_hdf5 import write_synthetic_episode
+from core.converters.configuration_data_convertor import HDF5DataConvertorConfig
+from core.converters.hdf5_data_convertor import can_read_direct_chunks, open_hdf5, read_image_records
+
+_STORAGES = {
+    'contiguous': dict(chunked=False),
+    'chunked': dict(chunked=True),
+    'chunked+gzip': dict(chunked=True, compression='gzip'),
+}
+
+
+def read_episode(path, config):
+    with open_hdf5(path, config) as f:
+        for dataset in f['observations']['images'].values():
+            read_image_records(dataset, direct=config.direct_chunk_read)
+        f['observations']['qpos'][:]
+        f['action'][:]
+
+
+def benchmark(path, config, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        read_episode(path, config)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args):
+    modes = {
+        'default': HDF5DataConvertorConfig(),
+        'chunk cache': HDF5DataConvertorConfig(chunk_cache_size=args.chunk_cache_size),
+        'direct chunks': HDF5DataConvertorConfig(chunk_cache_size=args.chunk_cache_size, direct_chunk_read=True),
+    }
+    print(f'{args.num_frames} frames, {args.num_cameras} cameras of {args.height}x{args.width}, '
+          f'best of {args.repeats} runs (files are in the page cache after the first run)')
+
+    for storage, kwargs in _STORAGES.items():
+        path = os.path.join(args.work_dir, f'{storage}.hdf5')
+        write_synthetic_episode(
+            path,
+            num_frames=args.num_frames,
+            cameras=[f'cam_{i}' for i in range(args.num_cameras)],
+            height=args.height,
+            width=args.width,
+            **kwargs,
+        )
+        with open_hdf5(path) as f:
+            direct = all(can_read_direct_chunks(dataset) for dataset in f['observations']['images'].values())
+
+        for mode, config in modes.items():
+            if config.direct_chunk_read and not direct:
+                continue
+            elapsed = benchmark(path, config, args.repeats)
+            print(f'{storage:<14s} {mode:<14s} {args.num_frames / elapsed:10.1f} frames/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--work_dir', type=str, default=os.path.join(tempfile.gettempdir(), 'rdp_benchmark_read'), help='Directory for the synthetic episodes.')
+    parser.add_argument('--num_frames', type=int, default=300, help='Number of frames per episode.')
+    parser.add_argument('--num_cameras', type=int, default=3, help='Number of cameras per episode.')
+    parser.add_argument('--height', type=int, default=480, help='Frame height.')
+    parser.add_argument('--width', type=int, default=640, help='Frame width.')
+    parser.add_argument('--chunk_cache_size', type=int, default=64 * 2 ** 20, help='Raw chunk cache size in bytes for the tuned modes.')
+    parser.add_argument('--repeats', type=int, default=5, help='Number of runs per configuration, the best is reported.')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,87 @@
+"""
+Benchmark writing the low-dimensional columns of an episode to parquet, through `datasets`
+(what `LeRobotDataset.save_episode` does) and directly with pyarrow, and check that both files are identical.
+
+```bash
+python scripts/benchmark_parquet_write.py --num_frames 1000 --state_dim 128
+```
+"""
+
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import datasets
+import numpy as np
+
+import sys
+sys.path.append('.')
+
+from core.converters.parquet_writer import write_episode_parquet
+
+
+def get_episode(num_frames, state_dim):
+    features = datasets.Features({
+        'observation.state': datasets.Sequence(length=state_dim, feature=datasets.Value('float32')),
+        'action': datasets.Sequence(length=state_dim, feature=datasets.Value('float32')),
+        'timestamp': datasets.Value('float32'),
+        'frame_index': datasets.Value('int64'),
+        'episode_index': datasets.Value('int64'),
+        'index': datasets.Value('int64'),
+        'task_index': datasets.Value('int64'),
+    })
+    rng = np.random.default_rng(0)
+    episode_buffer = {
+        'observation.state': rng.random((num_frames, state_dim), dtype=np.float32),
+        'action': rng.random((num_frames, state_dim), dtype=np.float32),
+        'timestamp': (np.arange(num_frames) / 30).astype(np.float32),
+        'frame_index': np.arange(num_frames),
+        'episode_index': np.zeros(num_frames, dtype=np.int64),
+        'index': np.arange(num_frames),
+        'task_index': np.zeros(num_frames, dtype=np.int64),
+    }
+    return episode_buffer, features
+
+
+def write_with_datasets(episode_buffer, features, path):
+    episode_dict = {key: episode_buffer[key] for key in features}
+    datasets.Dataset.from_dict(episode_dict, features=features, split='train').to_parquet(path)
+
+
+def benchmark(write, episode_buffer, features, path, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        write(episode_buffer, features, path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args):
+    datasets.disable_progress_bars()
+    os.makedirs(args.work_dir, exist_ok=True)
+    episode_buffer, features = get_episode(args.num_frames, args.state_dim)
+    paths = {
+        'datasets': Path(args.work_dir) / 'datasets.parquet',
+        'pyarrow': Path(args.work_dir) / 'pyarrow.parquet',
+    }
+    writers = {'datasets': write_with_datasets, 'pyarrow': write_episode_parquet}
+
+    print(f'{args.num_frames} frames, state and action of dimension {args.state_dim}, best of {args.repeats} runs')
+    for name, write in writers.items():
+        elapsed = benchmark(write, episode_buffer, features, paths[name], args.repeats)
+        print(f'{name:<10s} {elapsed * 1000:8.1f} ms {args.num_frames / elapsed:12.1f} frames/s')
+    print(f'identical files: {filecmp.cmp(paths["datasets"], paths["pyarrow"], shallow=False)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--work_dir', type=str, default=os.path.join(tempfile.gettempdir(), 'rdp_benchmark_parquet'), help='Directory for the written parquet files.')
+    parser.add_argument('--num_frames', type=int, default=1000, help='Number of frames per episode.')
+    parser.add_argument('--state_dim', type=int, default=128, help='Dimension of the state and action vectors.')
+    parser.add_argument('--repeats', type=int, default=5, help='Number of runs per writer, the best is reported.')
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,116 @@
+"""
+Merge the partial datasets written by `hdf5_to_lerobot.py --num_shards N --shard_index i` into one dataset.
+Episodes, frame indices and tasks are renumbered in shard order, which is the sorted source order.
+
+```bash
+# on node i of N
+python scripts/hdf5_to_lerobot.py --root path/of/your/hdfs/root --repo_id your/lerobot/repo_id --num_shards N --shard_index i
+
+# once every shard is done
+python scripts/consolidate_shards.py --repo_id your/lerobot/repo_id --num_shards N
+```
+"""
+
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+import sys
+sys.path.append('.')
+
+from lerobot.datasets.utils import load_jsonlines, write_jsonlines
+
+from core.converters.base_data_convertor import SOURCES_PATH, get_lerobot_default_root
+from core.converters.sharding import get_shard_name
+from scripts.merge_lerobot import merge_datasets
+
+
+def find_shards(data_root, num_shards):
+    shards = []
+    for shard_index in range(num_shards):
+        shard_root = get_shard_name(data_root, num_shards, shard_index)
+        info_path = os.path.join(shard_root, 'meta', 'info.json')
+        if not os.path.exists(info_path):
+            # a shard without files never creates its dataset
+            print(f'Skipping shard {shard_index}: no dataset at {shard_root}.')
+            continue
+        with open(info_path, 'r') as f:
+            info = json.load(f)
+        if info['total_episodes'] == 0:
+            print(f'Skipping shard {shard_index}: no episodes in {shard_root}.')
+            continue
+        shards.append((shard_root, info))
+    return shards
+
+
+def merge_sources(shards, output_root):
+    # sources of the shards, with episode indices shifted like `merge_datasets` does
+    records, offset = [], 0
+    for shard_root, info in shards:
+        sources_path = os.path.join(shard_root, SOURCES_PATH)
+        if os.path.exists(sources_path):
+            for record in load_jsonlines(sources_path):
+                records.append({'episode_index': record['episode_index'] + offset, 'source': record['source']})
+        offset += info['total_episodes']
+    write_jsonlines(records, Path(output_root) / SOURCES_PATH)
+
+
+def shift_index_stats(output_root):
+    """
+    `merge_datasets` renumbers the index and episode_index columns but copies the episode stats of the shards,
+    shift their min, max and mean from the shard numbering to the merged one.
+    """
+    meta_root = Path(output_root) / 'meta'
+    episodes = load_jsonlines(meta_root / 'episodes.jsonl')
+    starts, start = {}, 0
+    for episode in sorted(episodes, key=lambda episode: episode['episode_index']):
+        starts[episode['episode_index']] = start
+        start += episode['length']
+
+    records = load_jsonlines(meta_root / 'episodes_stats.jsonl')
+    for record in records:
+        episode_index, stats = record['episode_index'], record['stats']
+        offsets = {
+            'index': starts[episode_index] - stats['index']['min'][0],
+            'episode_index': episode_index - stats['episode_index']['min'][0],
+        }
+        for key, offset in offsets.items():
+            for name in ('min', 'max', 'mean'):
+                stats[key][name] = [value + offset for value in stats[key][name]]
+    write_jsonlines(records, meta_root / 'episodes_stats.jsonl')
+
+
+def main(args):
+    data_root = args.data_root if args.data_root is not None else os.path.join(get_lerobot_default_root(), args.repo_id)
+    shards = find_shards(data_root, args.num_shards)
+    if not shards:
+        raise ValueError(f'No shard of {data_root} contains episodes.')
+
+    if os.path.exists(data_root):
+        if not args.overwrite:
+            raise ValueError(f'{data_root} already exists, pass --overwrite to replace it.')
+        shutil.rmtree(data_root)
+
+    info = shards[0][1]
+    # shards share their features, so the state is never padded
+    state_dim = info['features']['observation.state']['shape'][0]
+    merge_datasets([shard_root for shard_root, _ in shards], data_root, max_dim=state_dim, default_fps=info['fps'])
+    merge_sources(shards, data_root)
+    shift_index_stats(data_root)
+
+    if args.remove_shards:
+        for shard_root, _ in shards:
+            shutil.rmtree(shard_root)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repo_id', type=str, required=True, help='Lerobot repository ID of the consolidated dataset.')
+    parser.add_argument('--data_root', type=str, default=None, help='Root of the consolidated dataset (defaults to the lerobot cache).')
+    parser.add_argument('--num_shards', type=int, required=True, help='Number of shards the conversion was split into.')
+    parser.add_argument('--overwrite', action='store_true', help='Replace an existing consolidated dataset.')
+    parser.add_argument('--remove_shards', action='store_true', help='Delete the partial datasets after merging.')
+    args = parser.parse_args()
+    main(args)
@@ -1,8 +1,10 @@
 import argparse
+import json
 import sys
 sys.path.append('.')
 
 from core.converters.hdf5_data_convertor import HDF5DataConvertor
+from core.converters.video_encoding import VIDEO_PROFILES
 from core.converters.configuration_data_convertor import HDF5DataConvertorConfig
 
 
@@ -12,13 +14,47 @@ def main(args):
         root=args.root,
         fps=args.fps,
         video_backend=args.video_backend,
+        video_profile=args.video_profile,
+        video_options=json.loads(args.video_options) if args.video_options is not None else None,
+        stream_video=args.stream_video,
         overwrite=args.overwrite,
         check_only=args.check_only,
+        resume=args.resume,
+        max_failures=args.max_failures,
+        quarantine_report_path=args.quarantine_report_path,
+        profile_stages=args.profile_stages,
+        profile_episodes=args.profile_episodes,
+        profile_report_path=args.profile_report_path,
         image_prefix=args.image_prefix,
         default_task=args.default_task,
+        image_transforms=json.loads(args.image_transforms) if args.image_transforms is not None else None,
         image_writer_processes=args.image_writer_processes,
         image_writer_threads=args.image_writer_threads,
+        memory_budget=args.memory_budget,
+        frame_pool=args.frame_pool,
+        dtypes=json.loads(args.dtypes) if args.dtypes is not None else None,
+        dtype_tolerance=args.dtype_tolerance,
+        async_save=args.async_save,
+        max_pending_saves=args.max_pending_saves,
+        direct_parquet=args.direct_parquet,
+        num_read_workers=args.num_read_workers,
+        prefetch_episodes=args.prefetch_episodes,
+        image_decode_threads=args.image_decode_threads,
+        stream_chunk_size=args.stream_chunk_size,
+        image_passthrough=args.image_passthrough,
+        chunk_cache_size=args.chunk_cache_size,
+        direct_chunk_read=args.direct_chunk_read,
+        trim_idle=args.trim_idle,
+        idle_velocity_threshold=args.idle_velocity_threshold,
+        idle_margin=args.idle_margin,
+        manifest_path=args.manifest_path,
+        check_report_path=args.check_report_path,
+        num_shards=args.num_shards,
+        shard_index=args.shard_index,
     )
+    if args.state_layout is not None:
+        # 'null' keeps the source state and action vectors unchanged
+        config.state_layout = json.loads(args.state_layout)
     convertor = HDF5DataConvertor(config)
     convertor.convert()
 
@@ -29,11 +65,43 @@ if __name__ == '__main__':
     parser.add_argument('--repo_id', type=str, required=True, help='Lerobot repository ID to save the dataset.')
     parser.add_argument('--fps', type=int, default=30, help='Frames per second for the output videos.')
     parser.add_argument('--video_backend', type=str, default='pyav', help='Video backend for lerobot (pyav or torchcodec).')
+    parser.add_argument('--video_profile', type=str, default=None, choices=list(VIDEO_PROFILES), help='Video encoding profile, recorded in info.json (lerobot defaults if not set).')
+    parser.add_argument('--video_options', type=str, default=None, help='JSON dict of profile fields to override, e.g. \'{"crf": 25, "threads": 4}\'.')
+    parser.add_argument('--stream_video', action='store_true', help='Encode frames into the videos as they are added instead of writing PNG images first.')
     parser.add_argument('--overwrite', action='store_true', help='Whether to overwrite existing dataset.')
+    parser.add_argument('--resume', action='store_true', help='Resume an interrupted conversion or append new sources to an existing dataset.')
+    parser.add_argument('--max_failures', type=int, default=0, help='Skip up to this many sources that fail to convert, recording them in a quarantine report (0 aborts on the first failure).')
+    parser.add_argument('--quarantine_report_path', type=str, default=None, help='Path of the JSON report of failed sources (meta/quarantine.json of the dataset by default).')
+    parser.add_argument('--profile_stages', action='store_true', help='Time each conversion stage and print a summary at the end.')
+    parser.add_argument('--profile_episodes', action='store_true', help='Also record the stage timings of every episode.')
+    parser.add_argument('--profile_report_path', type=str, default=None, help='Path of the JSON timing report written with --profile_stages.')
     parser.add_argument('--check_only', action='store_true', help='If set, only check the data without converting.')
     parser.add_argument('--image_prefix', type=str, default='observation.images', help='Prefix for image keys in the data.')
+    parser.add_argument('--image_transforms', type=str, default=None, help='JSON dict of per-camera crop and resize, e.g. \'{"observation.images.cam_left_wrist": {"size": [224, 224]}}\'.')
+    parser.add_argument('--state_layout', type=str, default=None, help='JSON list of source state segments kept in the output, e.g. \'[{"name": "left_joint", "range": [0, 7]}]\', or null to keep the source vectors (the convertor layout if not set).')
     parser.add_argument('--default_task', type=str, default='do something', help='Default task for lerobot.')
     parser.add_argument('--image_writer_processes', type=int, default=1, help='Number of processes for image writing.')
     parser.add_argument('--image_writer_threads', type=int, default=1, help='Number of threads for image writing.')
+    parser.add_argument('--async_save', action='store_true', help='Save episodes (stats, parquet, video encoding) on a background thread while the next one is converted.')
+    parser.add_argument('--max_pending_saves', type=int, default=1, help='Maximum number of episodes being saved in the background with --async_save.')
+    parser.add_argument('--direct_parquet', action='store_true', help='Write episode parquet files directly with pyarrow instead of through datasets.')
+    parser.add_argument('--dtypes', type=str, default=None, help='JSON dict of output dtypes of low-dim features, e.g. \'{"observation.state": "float32", "action": "float32"}\'.')
+    parser.add_argument('--dtype_tolerance', type=float, default=1e-3, help='Warn when casting to --dtypes loses more than this absolute error.')
+    parser.add_argument('--memory_budget', type=int, default=0, help='Bytes of decoded frames in flight between reading and writing, reading pauses above it (0 for no limit).')
+    parser.add_argument('--frame_pool', action='store_true', help='Decode episodes into frame arenas reused across episodes (not used with read workers or streaming).')
+    parser.add_argument('--num_read_workers', type=int, default=0, help='Number of processes for parsing HDF5 files (0 to parse on the main process).')
+    parser.add_argument('--prefetch_episodes', type=int, default=2, help='Maximum number of parsed episodes kept in flight by the read workers.')
+    parser.add_argument('--image_decode_threads', type=int, default=0, help='Number of threads for batch JPEG decoding per camera (0 to decode frame by frame).')
+    parser.add_argument('--stream_chunk_size', type=int, default=0, help='If > 0, stream episodes from HDF5 in chunks of this many frames to bound memory.')
+    parser.add_argument('--image_passthrough', action='store_true', help='Store the original JPEG bytes without decoding (requires --video_backend none).')
+    parser.add_argument('--chunk_cache_size', type=int, default=0, help='Raw chunk cache size in bytes per open HDF5 file (0 for the h5py default of 1 MiB).')
+    parser.add_argument('--direct_chunk_read', action='store_true', help='Read image records directly from the stored chunks when each chunk holds whole records.')
+    parser.add_argument('--trim_idle', action='store_true', help='Drop the leading and trailing frames where the robot stands still, before decoding their images.')
+    parser.add_argument('--idle_velocity_threshold', type=float, default=0.01, help='State or action speed (units per second) above which the robot counts as moving.')
+    parser.add_argument('--idle_margin', type=int, default=0, help='Number of idle frames kept before the first and after the last movement.')
+    parser.add_argument('--manifest_path', type=str, default=None, help='Path of a cached manifest of the HDF5 files, refreshed incrementally on each run.')
+    parser.add_argument('--check_report_path', type=str, default=None, help='Path of the JSON report written by --check_only.')
+    parser.add_argument('--num_shards', type=int, default=1, help='Split the sorted HDF5 files into this many contiguous shards, e.g. one per node.')
+    parser.add_argument('--shard_index', type=int, default=0, help='Shard converted by this run, written to <repo_id>_shard-XXX-of-YYY.')
     args = parser.parse_args()
     main(args)
\ No newline at end of file
@@ -7,6 +7,8 @@ import traceback
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 
 def load_jsonl(file_path):
@@ -74,6 +76,27 @@ def save_jsonl(data, file_path):
             f.write(json.dumps(item) + "\n")
 
 
+def save_parquet(df, source_path, dest_path):
+    """
+    保存parquet文件，并保留源文件中的huggingface特征元数据
+    (Save a parquet file, keeping the huggingface feature metadata of the source file)
+
+    Without it, image columns are read back as plain structs instead of images.
+
+    Args:
+        df (pd.DataFrame): 要保存的数据 (Data to save)
+        source_path (str): 源parquet文件路径 (Path to the source parquet file)
+        dest_path (str): 输出parquet文件路径 (Path to the output parquet file)
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    source_metadata = pq.read_schema(source_path).metadata or {}
+    if b"huggingface" in source_metadata:
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"huggingface"] = source_metadata[b"huggingface"]
+        table = table.replace_schema_metadata(metadata)
+    pq.write_table(table, dest_path)
+
+
 def merge_stats(stats_list):
     """
     合并多个数据集的统计信息，确保维度一致性
@@ -675,7 +698,7 @@ def copy_data_files(
                 dest_path = os.path.join(chunk_dir, f"episode_{new_index:06d}.parquet")
 
                 # 保存到正确位置 (Save to correct location)
-                df.to_parquet(dest_path, index=False)
+                save_parquet(df, source_path, dest_path)
 
                 total_copied += 1
                 print(f"已处理并保存: {dest_path} (Processed and saved: {dest_path})")
@@ -779,7 +802,7 @@ def copy_data_files(
                             dest_path = os.path.join(chunk_dir, f"episode_{new_index:06d}.parquet")
 
                             # 保存到正确位置 (Save to correct location)
-                            df.to_parquet(dest_path, index=False)
+                            save_parquet(df, source_path, dest_path)
 
                             total_copied += 1
                             found = True
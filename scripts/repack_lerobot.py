@@ -1,9 +1,11 @@
 import argparse
+import json
 import sys
 sys.path.append('.')
 
 from core.converters.configuration_data_convertor import LeRobotDataConvertorConfig
 from core.converters.lerobot_data_convertor import LeRobotDataConvertor
+from core.converters.video_encoding import VIDEO_PROFILES
 
 
 def main(args):
@@ -13,13 +15,32 @@ def main(args):
         repo_id=args.repo_id,
         fps=args.fps,
         video_backend=args.video_backend,
+        video_profile=args.video_profile,
+        video_options=json.loads(args.video_options) if args.video_options is not None else None,
+        stream_video=args.stream_video,
         overwrite=args.overwrite,
         check_only=args.check_only,
+        resume=args.resume,
+        max_failures=args.max_failures,
+        quarantine_report_path=args.quarantine_report_path,
+        profile_stages=args.profile_stages,
+        profile_episodes=args.profile_episodes,
+        profile_report_path=args.profile_report_path,
         image_prefix=args.image_prefix,
         default_task=args.default_task,
+        image_transforms=json.loads(args.image_transforms) if args.image_transforms is not None else None,
         image_writer_processes=args.image_writer_processes,
         image_writer_threads=args.image_writer_threads,
+        memory_budget=args.memory_budget,
+        dtypes=json.loads(args.dtypes) if args.dtypes is not None else None,
+        dtype_tolerance=args.dtype_tolerance,
+        async_save=args.async_save,
+        max_pending_saves=args.max_pending_saves,
+        direct_parquet=args.direct_parquet,
     )
+    if args.state_layout is not None:
+        # 'null' keeps the source state and action vectors unchanged
+        config.state_layout = json.loads(args.state_layout)
     convertor = LeRobotDataConvertor(config)
     convertor.convert()
 
@@ -31,11 +52,28 @@ if __name__ == '__main__':
     parser.add_argument('--repo_id', type=str, required=True, help='Lerobot repository ID to save the dataset.')
     parser.add_argument('--fps', type=int, default=30, help='Frames per second for the output videos.')
     parser.add_argument('--video_backend', type=str, default='pyav', help='Video backend for lerobot (pyav or torchcodec).')
+    parser.add_argument('--video_profile', type=str, default=None, choices=list(VIDEO_PROFILES), help='Video encoding profile, recorded in info.json (lerobot defaults if not set).')
+    parser.add_argument('--video_options', type=str, default=None, help='JSON dict of profile fields to override, e.g. \'{"crf": 25, "threads": 4}\'.')
+    parser.add_argument('--stream_video', action='store_true', help='Encode frames into the videos as they are added instead of writing PNG images first.')
     parser.add_argument('--overwrite', action='store_true', help='Whether to overwrite existing dataset.')
+    parser.add_argument('--resume', action='store_true', help='Resume an interrupted conversion or append new sources to an existing dataset.')
+    parser.add_argument('--max_failures', type=int, default=0, help='Skip up to this many sources that fail to convert, recording them in a quarantine report (0 aborts on the first failure).')
+    parser.add_argument('--quarantine_report_path', type=str, default=None, help='Path of the JSON report of failed sources (meta/quarantine.json of the dataset by default).')
+    parser.add_argument('--profile_stages', action='store_true', help='Time each conversion stage and print a summary at the end.')
+    parser.add_argument('--profile_episodes', action='store_true', help='Also record the stage timings of every episode.')
+    parser.add_argument('--profile_report_path', type=str, default=None, help='Path of the JSON timing report written with --profile_stages.')
     parser.add_argument('--check_only', action='store_true', help='If set, only check the data without converting.')
     parser.add_argument('--image_prefix', type=str, default='observation.images', help='Prefix for image keys in the data.')
+    parser.add_argument('--image_transforms', type=str, default=None, help='JSON dict of per-camera crop and resize, e.g. \'{"observation.images.cam_left_wrist": {"size": [224, 224]}}\'.')
+    parser.add_argument('--state_layout', type=str, default=None, help='JSON list of source state segments kept in the output, e.g. \'[{"name": "left_joint", "range": [0, 7]}]\', or null to keep the source vectors (the convertor layout if not set).')
     parser.add_argument('--default_task', type=str, default='do something', help='Default task for lerobot.')
     parser.add_argument('--image_writer_processes', type=int, default=1, help='Number of processes for image writing.')
     parser.add_argument('--image_writer_threads', type=int, default=1, help='Number of threads for image writing.')
+    parser.add_argument('--async_save', action='store_true', help='Save episodes (stats, parquet, video encoding) on a background thread while the next one is converted.')
+    parser.add_argument('--max_pending_saves', type=int, default=1, help='Maximum number of episodes being saved in the background with --async_save.')
+    parser.add_argument('--direct_parquet', action='store_true', help='Write episode parquet files directly with pyarrow instead of through datasets.')
+    parser.add_argument('--dtypes', type=str, default=None, help='JSON dict of output dtypes of low-dim features, e.g. \'{"observation.state": "float32", "action": "float32"}\'.')
+    parser.add_argument('--dtype_tolerance', type=float, default=1e-3, help='Warn when casting to --dtypes loses more than this absolute error.')
+    parser.add_argument('--memory_budget', type=int, default=0, help='Bytes of decoded frames in flight between reading and writing, reading pauses above it (0 for no limit).')
     args = parser.parse_args()
     main(args)
\ No newline at end of file